@@ -0,0 +1,248 @@
+import json
+import time
+import random
+import asyncio
+import logging
+import statistics
+
+from collections import Counter
+from urllib.parse import urlencode
+
+from .stats import CacheStats
+
+logger = logging.getLogger(__name__)
+
+
+class LoadTest:
+    """
+    Open loop load test of the movies search, driving the ASGI app in
+    process at a target rate.
+
+    Requests are sent on schedule whether or not the earlier ones completed,
+    and latency is measured from the scheduled time, so a slow app shows up
+    in the percentiles instead of lowering the request rate. Search terms
+    are picked with a zipf like skew, so popular ones repeat like in live
+    traffic.
+    """
+
+    # metrics compared against the baseline, True if higher is better
+    METRICS = {
+        "p50_ms": False,
+        "p95_ms": False,
+        "p99_ms": False,
+        "throughput": True,
+        "cache_hit_ratio": True,
+        "upstream_calls_per_request": False,
+    }
+
+    def __init__(
+        self,
+        app,
+        queries,
+        rps=50,
+        duration=30,
+        pages=3,
+        skew=1.1,
+        max_in_flight=1000,
+        path="/api/movies",
+        seed=42,
+    ):
+        """Initialize load test
+
+        Args:
+            app (callable): ASGI application.
+            queries (list): Search terms to pick from.
+            rps (float): Target requests per second.
+            duration (float): Seconds to send requests for.
+            pages (int): Result pages per search term to pick from.
+            skew (float): Zipf exponent of the search terms popularity.
+            max_in_flight (int): Requests in flight, more are dropped.
+            path (str): Path of the movies search API.
+            seed (int): Seed of the request mix.
+        """
+        self.app = app
+        self.queries = queries
+        self.rps = rps
+        self.duration = duration
+        self.pages = pages
+        self.max_in_flight = max_in_flight
+        self.path = path
+        self.rng = random.Random(seed)
+        self.weights = [1 / (rank + 1) ** skew for rank in range(len(queries))]
+        self.latencies = []
+        self.statuses = Counter()
+        self.in_flight = 0
+        self.dropped = 0
+
+    def next_params(self):
+        query = self.rng.choices(self.queries, weights=self.weights)[0]
+        return {"q": query, "page": self.rng.randint(1, self.pages)}
+
+    async def request(self, params):
+        """Sends a GET request to the ASGI app, returns the status code."""
+        done = asyncio.Event()
+        request_sent = False
+        status = None
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": urlencode(params).encode(),
+            "root_path": "",
+            "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # client stays connected till the response completes
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return status
+
+    async def timed_request(self, scheduled_at):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            status = await self.request(self.next_params())
+        except Exception:
+            logger.exception("Load test request failed")
+            status = "error"
+        finally:
+            self.in_flight -= 1
+        self.statuses[status] += 1
+        self.latencies.append((loop.time() - scheduled_at) * 1000)
+
+    async def run(self, upstream_counters=None):
+        """Sends requests at the target rate for the duration.
+
+        Args:
+            upstream_counters (Counter): Requests received by the upstream,
+                like FakeOMDB.counters, to report upstream calls.
+        Returns:
+            dict: Report of the run.
+        """
+        loop = asyncio.get_running_loop()
+        stats_before = CacheStats.snapshot()
+        upstream_before = Counter(upstream_counters or {})
+        started = loop.time()
+        tasks = []
+        for index in range(int(self.rps * self.duration)):
+            scheduled_at = started + index / self.rps
+            delay = scheduled_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.in_flight >= self.max_in_flight:
+                self.dropped += 1
+                continue
+            tasks.append(asyncio.ensure_future(self.timed_request(scheduled_at)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+
+        stats_after = CacheStats.snapshot()
+        upstream = None
+        if upstream_counters is not None:
+            upstream = dict(Counter(upstream_counters) - upstream_before)
+        return self.report(elapsed, stats_before, stats_after, upstream)
+
+    @staticmethod
+    def cache_hit_ratio(before, after):
+        """Searches served from L1 or redis out of all the cache lookups."""
+        def delta(key):
+            return after.get(key, 0) - before.get(key, 0)
+
+        lookups = delta("movies.hits") + delta("movies.misses")
+        if not lookups:
+            return None
+        return round((delta("movies.hits") + delta("redis.hits")) / lookups, 4)
+
+    def report(self, elapsed, stats_before, stats_after, upstream):
+        completed = len(self.latencies)
+        latencies = sorted(self.latencies)
+        percentiles = (
+            statistics.quantiles(latencies, n=100, method="inclusive")
+            if completed > 1
+            else latencies * 99
+        )
+        upstream_calls = (
+            upstream.get("search", 0) + upstream.get("lookup", 0)
+            if upstream is not None
+            else None
+        )
+        return {
+            "target_rps": self.rps,
+            "duration": round(elapsed, 2),
+            "requests": completed,
+            "dropped": self.dropped,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "errors": sum(
+                count for status, count in self.statuses.items()
+                if not isinstance(status, int) or status >= 500
+            ),
+            "throughput": round(completed / elapsed, 2) if elapsed else 0,
+            "p50_ms": round(percentiles[49], 2) if latencies else None,
+            "p95_ms": round(percentiles[94], 2) if latencies else None,
+            "p99_ms": round(percentiles[98], 2) if latencies else None,
+            "max_ms": round(latencies[-1], 2) if latencies else None,
+            "cache_hit_ratio": self.cache_hit_ratio(stats_before, stats_after),
+            "upstream": upstream,
+            "upstream_calls_per_request": (
+                round(upstream_calls / completed, 3)
+                if upstream_calls is not None and completed
+                else None
+            ),
+        }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Returns regressions of the report against the baseline report.
+
+    Args:
+        report (dict): Report of the run.
+        baseline (dict): Stored report to compare with.
+        tolerance (float): Allowed change as a fraction of the baseline.
+    Returns:
+        list: Regressed metrics as messages, empty if none.
+    """
+    regressions = []
+    for metric, higher_is_better in LoadTest.METRICS.items():
+        value, expected = report.get(metric), baseline.get(metric)
+        if value is None or expected is None:
+            continue
+        if higher_is_better:
+            regressed = value < expected * (1 - tolerance)
+        else:
+            regressed = value > expected * (1 + tolerance)
+        if regressed:
+            regressions.append(f"{metric} - {value} (baseline {expected})")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, report):
+    with open(path, "w") as baseline_file:
+        json.dump({**report, "saved_at": int(time.time())}, baseline_file, indent=2)
@@ -0,0 +1,448 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+
+from collections import OrderedDict
+
+from .config import curr_config
+from .codec import codec, make_cache_key
+from .connector import BaseRedis
+from .stats import CacheStats
+
+logger = logging.getLogger(__name__)
+
+# deletes the key only if it still holds the caller's token, releases locks
+# & reservations without touching one taken over by another caller
+COMPARE_AND_DELETE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LRUCache:
+    """
+    In-process LRU cache holding deserialized values, bounded by number of
+    items and serialized bytes, with per entry TTL.
+
+    Entries stay coherent across processes through redis pub/sub, writers
+    publish the key they updated and every other process drops its copy.
+    The TTL bounds staleness while the subscriber is not connected.
+    """
+
+    _instances = []
+
+    def __init__(self, namespace, ttl, max_items, max_bytes):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.channel = f"cache:invalidate:{namespace}"
+        # identifies this process on the invalidation channel
+        self.origin = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.size = 0
+        self._entries = OrderedDict()
+        self._listener = None
+        self._loop = None
+        self._redis = BaseRedis()
+        self._instances.append(self)
+
+    def get(self, key):
+        """Returns the cached value for the key, None if missing or expired."""
+        self._ensure_listener()
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self.pop(key)
+            CacheStats.miss(self.namespace)
+            return None
+        self._entries.move_to_end(key)
+        CacheStats.hit(self.namespace)
+        return entry[0]
+
+    def set(self, key, value, size, ttl=None):
+        """Caches the value, evicting least recently used entries over limits.
+
+        Args:
+            key (str): Cache key.
+            value (any): Deserialized value.
+            size (int): Serialized size of the value in bytes.
+            ttl (int): Seconds to keep the value, defaults to cache TTL.
+        """
+        ttl = min(ttl, self.ttl) if ttl is not None else self.ttl
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        self.pop(key)
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.size += size
+        while len(self._entries) > self.max_items or self.size > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    async def invalidate(self, key):
+        """Drops the key from L1 cache of the other processes."""
+        try:
+            async with self._redis.connect() as redis_conn:
+                await redis_conn.publish(self.channel, f"{self.origin}|{key}")
+        except Exception:
+            logger.exception("Unable to publish invalidation for key - %s", key)
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._loop is not loop:
+            self._loop = loop
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self._redis.connect() as redis_conn:
+                    async with redis_conn.pubsub() as pubsub:
+                        await pubsub.subscribe(self.channel)
+                        logger.info("Listening for invalidations on - %s", self.channel)
+                        while True:
+                            message = await pubsub.get_message(
+                                ignore_subscribe_messages=True, timeout=1.0
+                            )
+                            if not message:
+                                continue
+                            origin, _, key = message["data"].decode().partition("|")
+                            if origin != self.origin:
+                                self.pop(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation listener failed - %s, retrying", self.channel)
+                # invalidations may have been missed while disconnected
+                self.clear()
+                await asyncio.sleep(1)
+
+    async def close(self):
+        listener, self._listener, self._loop = self._listener, None, None
+        if listener and not listener.done():
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+
+    @classmethod
+    async def close_all(cls):
+        """Stops invalidation listeners of all the caches, on ASGI shutdown."""
+        for cache in cls._instances:
+            await cache.close()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent loads of the same cache key, so only one upstream
+    fetch happens per key.
+
+    Callers in the same process share one running task per key. Across
+    processes, the loader holds a short-lived redis lock while the others
+    poll the cache for its result, falling back to loading on their own
+    once the lock is gone or the lease expires.
+
+    Background loads (refresh of stale keys, prefetch) are guarded by the
+    same lock, so only one runs per key.
+    """
+
+    def __init__(self, namespace, lease=None, poll_interval=None):
+        self.namespace = namespace
+        self.lease = lease or curr_config.SINGLE_FLIGHT_LEASE
+        self.poll_interval = poll_interval or curr_config.SINGLE_FLIGHT_POLL_INTERVAL
+        self._inflight = {}
+        self._refreshing = {}
+        self._redis = BaseRedis()
+
+    def lock_key(self, key):
+        return f"lock:{self.namespace}:{key}"
+
+    async def do(self, key, loader, cached):
+        """Runs loader once for all the concurrent callers of a key.
+
+        Args:
+            key (str): Cache key being loaded.
+            loader (callable): Coroutine function fetching & caching the value.
+            cached (callable): Coroutine function returning the cached value
+                or None, used while waiting on another process.
+        Returns:
+            Value returned by the loader (or read from cache).
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, cached))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.info("Load in progress for key - %s, waiting for result", key)
+        # shielded, so a cancelled caller does not cancel the shared load
+        return await asyncio.shield(task)
+
+    def is_loading(self, key):
+        """Returns True if the key is being loaded in this process."""
+        return key in self._inflight or key in self._refreshing
+
+    def refresh(self, key, loader):
+        """Schedules a background load of the key, unless one is already running.
+
+        Args:
+            key (str): Cache key being refreshed.
+            loader (callable): Coroutine function fetching & caching the value.
+        Returns:
+            asyncio.Task: Scheduled refresh task, None if already refreshing.
+        """
+        if self.is_loading(key):
+            return None
+        task = asyncio.ensure_future(self._refresh(key, loader))
+        # holds a reference to the task till it completes
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    async def _refresh(self, key, loader):
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+        try:
+            if not await self._acquire(lock_key, token):
+                logger.info("Key - %s is being refreshed by another process", key)
+                return None
+            try:
+                logger.info("Refreshing key - %s in background", key)
+                return await loader()
+            finally:
+                await self._release(lock_key, token)
+        except Exception:
+            logger.exception("Error while refreshing key - %s in background", key)
+
+    async def _acquire(self, lock_key, token):
+        try:
+            async with self._redis.connect() as redis_conn:
+                return bool(
+                    await redis_conn.set(
+                        lock_key, token, nx=True, px=int(self.lease * 1000)
+                    )
+                )
+        except Exception:
+            logger.exception("Unable to acquire lock - %s, loading anyway", lock_key)
+            return True
+
+    async def _release(self, lock_key, token):
+        try:
+            async with self._redis.connect() as redis_conn:
+                await redis_conn.eval(COMPARE_AND_DELETE_SCRIPT, 1, lock_key, token)
+        except Exception:
+            logger.exception("Unable to release lock - %s", lock_key)
+
+    async def _wait(self, lock_key, cached):
+        """Polls the cache until the lock holder stores the value."""
+        deadline = asyncio.get_running_loop().time() + self.lease
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            value = await cached()
+            if value is not None:
+                return value
+            try:
+                async with self._redis.connect() as redis_conn:
+                    if not await redis_conn.exists(lock_key):
+                        break
+            except Exception:
+                logger.exception("Unable to check lock - %s", lock_key)
+                break
+        return await cached()
+
+    async def _load(self, key, loader, cached):
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+        acquired = await self._acquire(lock_key, token)
+        if not acquired:
+            logger.info("Key - %s is being loaded by another process, waiting", key)
+            value = await self._wait(lock_key, cached)
+            if value is not None:
+                return value
+            logger.info("No result from the lock holder for key - %s, loading", key)
+        try:
+            return await loader()
+        finally:
+            if acquired:
+                await self._release(lock_key, token)
+
+
+class Popularity:
+    """
+    Popularity counters in a redis sorted set, shared by all processes.
+
+    Every hit adds 1 to the member, and scores are halved once per elapsed
+    half-life so recent hits outweigh old ones. Faded members and the least
+    popular ones beyond the max size are trimmed while decaying.
+    """
+
+    # decays the scores by elapsed half-lives, at most once per half-life
+    DECAY_SCRIPT = """
+    local now = tonumber(redis.call("time")[1])
+    local last = tonumber(redis.call("get", KEYS[2]))
+    local half_life = tonumber(ARGV[1])
+    if not last then
+        redis.call("set", KEYS[2], now)
+        return 0
+    end
+    local half_lives = math.floor((now - last) / half_life)
+    if half_lives < 1 then
+        return 0
+    end
+    redis.call("set", KEYS[2], last + half_lives * half_life)
+    redis.call("zunionstore", KEYS[1], 1, KEYS[1], "WEIGHTS", tostring(0.5 ^ half_lives))
+    redis.call("zremrangebyscore", KEYS[1], "-inf", ARGV[2])
+    redis.call("zremrangebyrank", KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+    return half_lives
+    """
+
+    MIN_SCORE = 0.1
+
+    def __init__(self, key, half_life, max_members):
+        self.key = key
+        self.half_life = half_life
+        self.max_members = max_members
+        self._redis = BaseRedis()
+
+    @property
+    def decay_key(self):
+        return f"{self.key}:decayed_at"
+
+    async def record(self, members):
+        """Adds a hit to each member, decaying the scores when due."""
+        members = list(members)
+        try:
+            async with self._redis.connect() as redis_conn:
+                async with redis_conn.pipeline(transaction=False) as pipe:
+                    for member in members:
+                        pipe.zincrby(self.key, 1, member)
+                    pipe.eval(
+                        self.DECAY_SCRIPT,
+                        2,
+                        self.key,
+                        self.decay_key,
+                        self.half_life,
+                        self.MIN_SCORE,
+                        self.max_members,
+                    )
+                    *_, half_lives = await pipe.execute()
+            if half_lives:
+                logger.info("Decayed popularity - %s by %s half-lives", self.key, half_lives)
+        except Exception:
+            logger.exception("Unable to record popularity - %s", members)
+
+    async def top(self, limit):
+        """Returns the most popular members with scores, highest first."""
+        async with self._redis.connect() as redis_conn:
+            members = await redis_conn.zrevrange(self.key, 0, limit - 1, withscores=True)
+        return [(member.decode(), score) for member, score in members]
+
+
+class IdempotencyKeys:
+    """
+    Idempotency keys of requests in redis, shared by all processes.
+
+    The first request with a key reserves it for a short lease while it
+    runs, then stores its result for the TTL. Replays get the stored
+    result, and concurrent duplicates wait for the first one to complete.
+    A request that fails releases the key, so it can be retried.
+    """
+
+    # stores the result only if the key is still pending with the caller's token
+    COMPLETE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+    end
+    return false
+    """
+
+    def __init__(self, namespace, ttl, lease=None, poll_interval=None):
+        """Initialize idempotency keys
+
+        Args:
+            namespace (str): Key prefix, like 'idempotency:w2'.
+            ttl (int): Seconds a completed result is replayed for.
+            lease (int): Seconds a request holds the key while running.
+            poll_interval (float): Seconds between checks of waiting duplicates.
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.lease = lease or curr_config.IDEMPOTENCY_LEASE
+        self.poll_interval = poll_interval or curr_config.SINGLE_FLIGHT_POLL_INTERVAL
+        self._redis = BaseRedis()
+
+    def cache_key(self, key):
+        # keys are client provided, hashed to bound the length
+        return make_cache_key(self.namespace, key)
+
+    async def reserve(self, key):
+        """Reserves the key, or waits for the request holding it to complete.
+
+        Fails open when redis is unavailable, the request runs as usual.
+
+        Returns:
+            tuple(str, dict): Token of the reservation (None if not
+                reserved), result of the earlier request (None while it is
+                still running after the lease).
+        """
+        cache_key = self.cache_key(key)
+        token = codec.encode({"pending": uuid.uuid4().hex})
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lease
+        while True:
+            try:
+                async with self._redis.connect() as redis_conn:
+                    if await redis_conn.set(cache_key, token, nx=True, ex=self.lease):
+                        return token, None
+                    value = codec.decode(await redis_conn.get(cache_key))
+            except Exception:
+                logger.exception("Unable to reserve idempotency key - %s", cache_key)
+                return token, None
+            # key expires or is released in between, reserved on the next try
+            if value is not None and "pending" not in value:
+                return None, value
+            if loop.time() >= deadline:
+                return None, None
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, key, token, value):
+        """Stores the result of the request for replays.
+
+        The result is not stored once the lease expired & another request
+        reserved the key, its result is kept instead.
+        """
+        try:
+            async with self._redis.connect() as redis_conn:
+                stored = await redis_conn.eval(
+                    self.COMPLETE_SCRIPT,
+                    1,
+                    self.cache_key(key),
+                    token,
+                    codec.encode(value),
+                    self.ttl,
+                )
+            if not stored:
+                logger.warning("Reservation of idempotency key lost before completion - %s", key)
+        except Exception:
+            logger.exception("Unable to store result of idempotency key - %s", key)
+
+    async def release(self, key, token):
+        """Releases the key of a failed request, so it can be retried."""
+        try:
+            async with self._redis.connect() as redis_conn:
+                await redis_conn.eval(COMPARE_AND_DELETE_SCRIPT, 1, self.cache_key(key), token)
+        except Exception:
+            logger.exception("Unable to release idempotency key - %s", key)
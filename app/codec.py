@@ -0,0 +1,93 @@
+import zlib
+import hashlib
+import logging
+
+from .config import curr_config
+from .serializer import RawJSON, serializer
+
+logger = logging.getLogger(__name__)
+
+# bump to move all the cache keys to a new namespace
+CACHE_KEY_VERSION = "v1"
+
+
+def normalize(value):
+    """Case-folds & collapses whitespaces, so equivalent inputs match."""
+    return " ".join(str(value).split()).casefold()
+
+
+def make_cache_key(namespace, *parts):
+    """Forms a namespaced cache key with a hash of the normalized parts.
+
+    Args:
+        namespace (str): Key prefix, like 'movies'.
+        parts (tuple): Values identifying the entry (search term, page...).
+    Returns:
+        str: Cache key - '<namespace>:<version>:<hash>'
+    """
+    raw = "|".join(normalize(part) for part in parts)
+    digest = hashlib.sha256(raw.encode()).hexdigest()[:32]
+    return f"{namespace}:{CACHE_KEY_VERSION}:{digest}"
+
+
+class CacheCodec:
+    """
+    Encodes cache values to compact bytes & back.
+
+    First byte of the encoded value is the format version, so formats can
+    change without flushing the cache. Values are JSON (from the shared
+    serializer) and zlib compressed above a size threshold.
+    """
+
+    JSON = b"\x01"
+    JSON_ZLIB = b"\x02"
+
+    def __init__(self, compress_threshold=None, compress_level=None):
+        self.compress_threshold = (
+            compress_threshold or curr_config.CACHE_COMPRESS_THRESHOLD
+        )
+        self.compress_level = compress_level or curr_config.CACHE_COMPRESS_LEVEL
+
+    def encode(self, value):
+        data = serializer.dumps(value)
+        if len(data) >= self.compress_threshold:
+            return self.JSON_ZLIB + zlib.compress(data, self.compress_level)
+        return self.JSON + data
+
+    def _payload(self, data):
+        header, payload = data[:1], data[1:]
+        if header == self.JSON:
+            return payload
+        if header == self.JSON_ZLIB:
+            return zlib.decompress(payload)
+        logger.warning("Unknown cache value format - %s", header)
+        return None
+
+    def decode(self, data):
+        """Decodes the cached bytes, None for unknown / corrupt values."""
+        if not data:
+            return None
+        try:
+            payload = self._payload(data)
+            return serializer.loads(payload) if payload is not None else None
+        except Exception:
+            logger.exception("Unable to decode cached value")
+        return None
+
+    def decode_raw(self, data):
+        """Decodes the cached bytes to JSON without parsing, to be sent as is.
+
+        Returns:
+            RawJSON: JSON bytes, None for unknown / corrupt values.
+        """
+        if not data:
+            return None
+        try:
+            payload = self._payload(data)
+            return RawJSON(payload) if payload is not None else None
+        except Exception:
+            logger.exception("Unable to decode cached value")
+        return None
+
+
+codec = CacheCodec()
@@ -4,24 +4,119 @@ from task.settings import CURR_ENV
 class Config:
     ALLOWED_FILE_TYPES = ['image/png', 'image/jpeg', 'image/webp', 'application/pdf']
     WORKER_TIMEOUT = 120
+    # seconds clients may reuse the details of a finished W-2 job
+    W2_RESULT_MAX_AGE = 24 * 60 * 60
+    # seconds serialized details of a finished W-2 job are cached, for pollers
+    W2_RESULT_CACHE_TTL = 10 * 60
+    # seconds a successful result is reused for uploads of the same file
+    W2_DEDUP_WINDOW = 24 * 60 * 60
+    # seconds a POST with an Idempotency-Key is replayed for
+    W2_IDEMPOTENCY_TTL = 24 * 60 * 60
+    IDEMPOTENCY_LEASE = 30  # seconds a request holds its key while running
+    IDEMPOTENCY_KEY_MAX_LENGTH = 255
+    W2_MAX_UPLOAD_SIZE = 20 * 1024 * 1024  # bytes
+    W2_BATCH_MAX_FILES = 500  # files per batch submission
+    W2_BATCH_PAGE_SIZE = 50  # completed results per page of a batch
+    W2_BATCH_MAX_PAGE_SIZE = 200
     GEMINI_MODEL_ID = "gemini-2.5-flash"
-    OMDB_URL = "https://www.omdbapi.com/"
+    # shared gemini client (per worker process)
+    GEMINI_TIMEOUT = 90  # seconds per request, within WORKER_TIMEOUT
+    GEMINI_KEEPALIVE_TIMEOUT = 30  # seconds to keep idle connections alive
+    OMDB_URL = os.getenv("OMDB_URL", "https://www.omdbapi.com/")  # fake OMDB for benchmarks
     GEMINI_API_KEY = os.getenv("GEMINI_API_X", "")
     OMDB_API_KEY = os.getenv("OMDB_API_X", "")
     OMDB_RESULT_PER_PAGE = 10
+    MOVIES_MAX_PAGE_SIZE = 100  # results per page with page_size param
+    MOVIES_CATALOG_MIN_MATCHES = 50  # catalog matches to answer without OMDB
+    # latency budget of a search page, directors not resolved by then are
+    # returned as pending & filled into cache in background, 0 to disable
+    MOVIES_MAX_LATENCY_MS = 1500
+    MOVIES_MAX_LATENCY_LIMIT_MS = 30000
+    # popularity of searched pages, used to warm the cache after deploys
+    MOVIES_POPULARITY_HALF_LIFE = 24 * 60 * 60  # seconds
+    MOVIES_POPULARITY_MAX_KEYS = 10000
+    WARM_CACHE_TOP_N = 200
+    WARM_CACHE_CONCURRENCY = 5
     REDIS_CACHE_DEFAULT_TTL = 300
+    # shared aiohttp session (per worker process)
+    HTTP_POOL_LIMIT = 100  # total open connections
+    HTTP_KEEPALIVE_TIMEOUT = 30  # seconds to keep idle connections alive
+    HTTP_DNS_CACHE_TTL = 300  # seconds
+    # shared redis connection pool (per worker process)
+    REDIS_POOL_TIMEOUT = 5  # seconds to wait for a free connection
+    REDIS_SOCKET_TIMEOUT = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT = 2
+    REDIS_HEALTH_CHECK_INTERVAL = 30
+    DIRECTOR_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days, directors never change
+    # not found results are cached briefly, so repeated misses skip OMDB
+    DIRECTOR_NEGATIVE_CACHE_TTL = 60 * 60  # 1 hour
+    MOVIES_NEGATIVE_CACHE_TTL = 60  # seconds
+    # cluster wide upstream rate limits, shared by all workers & pods
+    RATE_LIMIT_MAX_WAIT = 5  # seconds a request may queue for a token
+    # retries & circuit breaker of external requests
+    RETRY_MAX_ATTEMPTS = 3
+    RETRY_BASE_DELAY = 0.2  # seconds, doubled every retry with full jitter
+    RETRY_MAX_DELAY = 2
+    RETRY_DEADLINE = 15  # seconds for all the attempts of a request
+    CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures to open the circuit
+    CIRCUIT_RESET_TIMEOUT = 30  # seconds before a trial request when open
+    # movie title suggestions
+    SUGGEST_MAX_LIMIT = 50  # suggestions per request
+    SUGGEST_MAX_SCAN = 1000  # matching titles ranked per request
+    SUGGEST_LOAD_BATCH = 1000  # titles loaded from redis per batch
+    SUGGEST_RELOAD_INTERVAL = 300  # seconds, picks titles seen by other workers
+    SUGGEST_MAX_TITLES = 50000  # most popular titles kept in redis & each worker
+    # json serializer of responses & cache values - orjson / json (stdlib)
+    JSON_SERIALIZER = "orjson"
+    # cache values encoding
+    CACHE_COMPRESS_THRESHOLD = 1024  # bytes, values above are zlib compressed
+    CACHE_COMPRESS_LEVEL = 6
+    # coalescing of concurrent cache misses
+    SINGLE_FLIGHT_LEASE = 10  # seconds a loader holds the lock
+    SINGLE_FLIGHT_POLL_INTERVAL = 0.1  # seconds between cache polls of waiters
+    # in-process L1 cache in front of redis for movies results
+    MOVIES_L1_TTL = 30  # seconds, upper bound of staleness across processes
+    MOVIES_L1_MAX_ITEMS = 1000
+    MOVIES_L1_MAX_BYTES = 32 * 1024 * 1024  # 32 MB of serialized results
 
 class LocalConfig(Config):
     MAX_CONCURRENCY = 5
+    HTTP_POOL_LIMIT_PER_HOST = 10
+    REDIS_MAX_CONNECTIONS = 20
+    GEMINI_POOL_LIMIT = 10  # open connections, as worker --max-async-tasks
+    RATE_LIMITS = {
+        "omdb": {"rate": 10, "burst": 20},  # requests per second, burst size
+    }
     MOVIES_CACHE_TTL = 300  # 5 minutes
+    MOVIES_CACHE_STALE_TTL = 300  # served stale & refreshed in background after TTL
+    MOVIES_PREFETCH_DEPTH = 1  # next pages loaded into cache in background
+    MOVIES_SEARCH_SOURCE = "omdb"  # omdb / catalog / auto
 
 class TestConfig(Config):
     MAX_CONCURRENCY = 10
+    HTTP_POOL_LIMIT_PER_HOST = 20
+    REDIS_MAX_CONNECTIONS = 50
+    GEMINI_POOL_LIMIT = 20
+    RATE_LIMITS = {
+        "omdb": {"rate": 10, "burst": 20},
+    }
     MOVIES_CACHE_TTL = 600
+    MOVIES_CACHE_STALE_TTL = 600
+    MOVIES_PREFETCH_DEPTH = 1
+    MOVIES_SEARCH_SOURCE = "omdb"
 
 class ProdConfig(Config):
     MAX_CONCURRENCY = 20
+    HTTP_POOL_LIMIT_PER_HOST = 40
+    REDIS_MAX_CONNECTIONS = 100
+    GEMINI_POOL_LIMIT = 40
+    RATE_LIMITS = {
+        "omdb": {"rate": 50, "burst": 100},
+    }
     MOVIES_CACHE_TTL = 600
+    MOVIES_CACHE_STALE_TTL = 1800
+    MOVIES_PREFETCH_DEPTH = 2
+    MOVIES_SEARCH_SOURCE = "auto"
 
 env_config = {
     "local": LocalConfig,
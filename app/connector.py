@@ -1,25 +1,289 @@
 import copy
 import json
+import time
+import random
 import logging
 import aiofiles
 import aiohttp
 import asyncio
+import httpx
 import redis.asyncio as redis
 
 from contextlib import asynccontextmanager
-from google.genai import Client
+from urllib.parse import urlparse
+from google.genai import Client, types
 from .config import curr_config
+from .codec import CACHE_KEY_VERSION, codec
+from .serializer import serializer
+from .stats import CacheStats
 from task.settings import REDIS_HOST
 
 logger = logging.getLogger(__name__)
 
 
+class HTTPSession:
+    """
+    Process wide aiohttp session shared by the external connectors.
+
+    Keeps connections alive between requests and caches DNS lookups, so
+    repeated calls to the same provider skip the TCP + TLS handshakes.
+    Opened on ASGI startup and closed on shutdown, created lazily otherwise.
+    """
+
+    _session = None
+    _loop = None
+
+    @classmethod
+    def get(cls):
+        """Returns the shared session, (re)creating it for the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=curr_config.HTTP_POOL_LIMIT,
+                limit_per_host=curr_config.HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=curr_config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=curr_config.HTTP_KEEPALIVE_TIMEOUT,
+            )
+            cls._session = aiohttp.ClientSession(connector=connector)
+            cls._loop = loop
+            logger.info("Created shared HTTP session for the worker process")
+        return cls._session
+
+    @classmethod
+    async def close(cls):
+        session, cls._session, cls._loop = cls._session, None, None
+        if session and not session.closed:
+            try:
+                await session.close()
+                logger.info("Closed shared HTTP session")
+            except Exception:
+                logger.exception("Error while closing shared HTTP session")
+
+
+class RateLimiter:
+    """
+    Cluster wide rate limiter for an upstream, shared through redis by all
+    the workers & pods (GCRA - generic cell rate algorithm).
+
+    Requests over the budget queue for a token till the max wait, instead
+    of failing right away.
+    """
+
+    # returns milliseconds to wait for a token, 0 when the token is granted
+    GCRA_SCRIPT = """
+    local time = redis.call("TIME")
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    local interval = tonumber(ARGV[1])
+    local tolerance = tonumber(ARGV[2])
+    local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+    if tat < now then
+        tat = now
+    end
+    local allow_at = tat - tolerance
+    if now < allow_at then
+        return math.ceil(allow_at - now)
+    end
+    local new_tat = tat + interval
+    redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now) + 1000)
+    return 0
+    """
+
+    # returns tokens available right now, without taking one
+    AVAILABLE_SCRIPT = """
+    local time = redis.call("TIME")
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    local interval = tonumber(ARGV[1])
+    local tolerance = tonumber(ARGV[2])
+    local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+    if tat < now then
+        tat = now
+    end
+    return math.max(0, math.floor((now - tat + tolerance) / interval) + 1)
+    """
+
+    def __init__(self, name, rate=None, burst=None, max_wait=None):
+        """Initialize rate limiter for an upstream
+
+        Args:
+            name (str): Upstream name, budget from Config.RATE_LIMITS.
+            rate (float): Requests per second, overrides config.
+            burst (int): Requests allowed at once, overrides config.
+            max_wait (float): Seconds to queue for a token, overrides config.
+        Raises:
+            ValueError: No rate configured or passed for the upstream.
+        """
+        budget = curr_config.RATE_LIMITS.get(name, {})
+        rate = rate or budget.get("rate")
+        if not rate or rate < 0:
+            raise ValueError(
+                f"No rate limit configured for '{name}', add a positive rate to "
+                "Config.RATE_LIMITS or pass rate."
+            )
+        self.name = name
+        self.key = f"ratelimit:{name}"
+        burst = burst or budget.get("burst", 1)
+        self.interval = 1000 / rate  # milliseconds between requests
+        self.tolerance = self.interval * (burst - 1)
+        self.max_wait = curr_config.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+
+    async def acquire(self):
+        """Waits for a token within max wait.
+
+        Returns:
+            bool: True if the request can proceed.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while True:
+            try:
+                async with BaseRedis().connect() as redis_conn:
+                    wait_ms = await redis_conn.eval(
+                        self.GCRA_SCRIPT, 1, self.key, self.interval, self.tolerance
+                    )
+            except Exception:
+                # fail open, redis outage should not stop upstream calls
+                logger.exception("Unable to check rate limit for - %s", self.name)
+                return True
+            if not wait_ms:
+                return True
+            wait = wait_ms / 1000
+            if loop.time() + wait > deadline:
+                logger.warning("Rate limit exceeded for - %s", self.name)
+                return False
+            await asyncio.sleep(wait)
+
+    async def available(self):
+        """Returns tokens available in the budget right now, 0 on errors."""
+        try:
+            async with BaseRedis().connect() as redis_conn:
+                return await redis_conn.eval(
+                    self.AVAILABLE_SCRIPT, 1, self.key, self.interval, self.tolerance
+                )
+        except Exception:
+            logger.exception("Unable to check rate limit for - %s", self.name)
+            return 0
+
+
+class RetryPolicy:
+    """
+    Retry policy for external requests - capped exponential backoff with
+    full jitter, within an overall deadline. Timeouts, connection errors
+    and retryable status codes (5xx / 429) are retried.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        max_attempts=None,
+        base_delay=None,
+        max_delay=None,
+        deadline=None,
+        exceptions=(asyncio.TimeoutError, aiohttp.ClientConnectionError),
+        retry_statuses=RETRY_STATUSES,
+    ):
+        """Initialize retry policy, defaults from Config.
+
+        Args:
+            max_attempts (int): Retries after the first attempt.
+            base_delay (float): Seconds of backoff for the first retry.
+            max_delay (float): Cap of the backoff in seconds.
+            deadline (float): Seconds for all attempts including backoff.
+            exceptions (tuple): Exceptions to be retried.
+            retry_statuses (tuple): Response status codes to be retried.
+        """
+        self.max_attempts = (
+            curr_config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        )
+        self.base_delay = base_delay or curr_config.RETRY_BASE_DELAY
+        self.max_delay = max_delay or curr_config.RETRY_MAX_DELAY
+        self.deadline = deadline or curr_config.RETRY_DEADLINE
+        self.exceptions = tuple(exceptions)
+        self.retry_statuses = tuple(retry_statuses)
+
+    def backoff(self, attempt):
+        """Seconds to wait before the retry, for the failed attempt (0 based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Per host circuit breaker for external requests.
+
+    Opens after consecutive failures and fails fast while open. Once the
+    reset timeout passes it turns half-open and lets a single trial request
+    through, closing on success and opening again on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    _breakers = {}
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = (
+            failure_threshold or curr_config.CIRCUIT_FAILURE_THRESHOLD
+        )
+        self.reset_timeout = reset_timeout or curr_config.CIRCUIT_RESET_TIMEOUT
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_at = None
+
+    @classmethod
+    def for_host(cls, url):
+        """Returns the process wide breaker of the url host."""
+        host = urlparse(url).netloc
+        if host not in cls._breakers:
+            cls._breakers[host] = cls(host)
+        return cls._breakers[host]
+
+    @property
+    def state(self):
+        if (
+            self._state == self.OPEN
+            and time.monotonic() >= self._opened_at + self.reset_timeout
+        ):
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self):
+        """Returns True if a request can go through."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if state == self.HALF_OPEN and (
+            self._trial_at is None or now >= self._trial_at + self.reset_timeout
+        ):
+            self._trial_at = now
+            return True
+        return False
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info("Circuit closed for - %s", self.name)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            logger.warning("Circuit opened for - %s", self.name)
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_at = None
+
+
 class ExternalConnector:
     """
     Connector class to connect to the external APIs
     """
 
-    def __init__(self, request, retry_config=None):
+    def __init__(self, request, retry_policy=None, rate_limiter=None):
         """Initialize function for external connector
 
         Args:
@@ -33,50 +297,94 @@ class ExternalConnector:
                 "data": "", # for other type of form / file inputs
                 "timeout": 30  # request timeout in seconds
             }
-            retry_config (dict): Following format
-            {
-                "max_attempts": 0, # Integer for timeout retry attempts
-                "exceptions": []  # list of exceptions to be retried
-            }
+            retry_policy (RetryPolicy): Retries of failed requests, no retries
+                by default.
+            rate_limiter (RateLimiter): Upstream budget, checked before requests.
         """
         self.request = request
-        self.retry_config = retry_config or {}
-        self.retry_attempts = self.retry_config.get("max_attempts", 0)
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=0)
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = CircuitBreaker.for_host(request["url"])
 
-    async def process_request(self, fmt="json"):
+    async def acquire(self):
+        """Waits for the upstream budget, True if the request can proceed."""
+        return await self.rate_limiter.acquire() if self.rate_limiter else True
+
+    def is_available(self):
+        """Returns False while the circuit of the upstream is open."""
+        return self.circuit_breaker.state != CircuitBreaker.OPEN
+
+    async def send(self, request, fmt="json"):
+        """Sends the request with retries, rate limit & circuit breaker checks.
+
+        Returns:
+            tuple(dict, int): Response & status code, status code is None if
+                no response was received.
+        """
         response, status_code = {}, None
-        try:
-            logger.info(
-                "Posting External API with request | URL - %s | METHOD - %s | PARAMS - %s",
-                self.request.get("url"),
-                self.request.get("method"),
-                self.request.get("params"),
-            )
-            async with aiohttp.ClientSession() as session:
-                async with session.request(**self.request) as resp:
+        policy = self.retry_policy
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.deadline
+        for attempt in range(policy.max_attempts + 1):
+            if not self.circuit_breaker.allow():
+                logger.warning("Circuit open for - %s, failing fast", request.get("url"))
+                return {"Response": "False", "Error": "Provider unavailable."}, 503
+            if not await self.acquire():
+                return {"Response": "False", "Error": "Rate limit exceeded."}, 429
+
+            retry = False
+            try:
+                timeout = max(min(request.get("timeout", 30), deadline - loop.time()), 1)
+                session = HTTPSession.get()
+                async with session.request(**{**request, "timeout": timeout}) as resp:
                     status_code = resp.status
-                    response = await getattr(resp, fmt)()
-            logger.info(
-                "External API '%s' completed with status - %s",
-                self.request.get("url"),
-                status_code,
-            )
-        except tuple(self.retry_config.get("exceptions", [])) as error:
-            if self.retry_attempts > 0:
-                logger.warning("%s - error occurred, retrying", str(error))
-                self.retry_attempts -= 1
-                return await self.process_request(fmt)
-            else:
+                    if fmt == "json":
+                        response = await resp.json(loads=serializer.loads)
+                    else:
+                        response = await getattr(resp, fmt)()
+                retry = status_code in policy.retry_statuses
+                logger.info(
+                    "External API '%s' completed with status - %s",
+                    request.get("url"),
+                    status_code,
+                )
+            except policy.exceptions as error:
+                logger.warning("%s - error occurred, retrying", repr(error))
+                response, status_code, retry = {}, None, True
+            except Exception:
                 logger.exception(
-                    "Max Retries exceeded, Error occurred while porcessing the request"
+                    "Error occurred while posting request to third party service - %s",
+                    request.get("url"),
                 )
-        except Exception:
-            logger.exception(
-                "Error occurred while posting request to third party service - %s",
-                self.url,
-            )
+                self.circuit_breaker.record_failure()
+                break
+
+            if not retry:
+                self.circuit_breaker.record_success()
+                break
+            self.circuit_breaker.record_failure()
+            delay = policy.backoff(attempt)
+            if attempt >= policy.max_attempts or loop.time() + delay >= deadline:
+                logger.error(
+                    "Max Retries exceeded, Error occurred while porcessing the request - %s",
+                    request.get("url"),
+                )
+                break
+            await asyncio.sleep(delay)
         return response, status_code
 
+    async def process_request(self, fmt="json"):
+        logger.info(
+            "Posting External API with request | URL - %s | METHOD - %s | PARAMS - %s",
+            self.request.get("url"),
+            self.request.get("method"),
+            self.request.get("params"),
+        )
+        return await self.send(self.request, fmt)
+
+
+omdb_rate_limiter = RateLimiter("omdb")
+
 
 class OMDBConnector(ExternalConnector):
     """OMDB Connector for movies search"""
@@ -95,38 +403,123 @@ class OMDBConnector(ExternalConnector):
             "params": data.pop("params"),
             "timeout": data.pop("timeout", 30),
         }
-        retry_config = {"max_attempts": 3, "exceptions": [asyncio.TimeoutError]}
-        super().__init__(request, retry_config=retry_config)
+        super().__init__(
+            request, retry_policy=RetryPolicy(), rate_limiter=omdb_rate_limiter
+        )
 
-    async def _fetch_director(self, session, movie_id, sem):
-        response = {}
+    @staticmethod
+    def director_cache_key(movie_id):
+        return f"director:{CACHE_KEY_VERSION}:{movie_id}"
+
+    async def _get_cached_directors(self, movies):
+        """Reads cached directors for all the movie ids in a single MGET."""
+        cached = {}
+        try:
+            async with BaseRedis().connect() as redis_conn:
+                values = await redis_conn.mget(
+                    [self.director_cache_key(_id) for _id in movies]
+                )
+            cached = {
+                _id: director
+                for _id, director in zip(movies, map(codec.decode, values))
+                if director is not None
+            }
+            # unknown directors served from cache, lookups saved
+            CacheStats.hit(
+                "directors-negative",
+                count=sum(director == "N/A" for director in cached.values()),
+            )
+        except Exception:
+            logger.exception("Unable to read cached directors for movies - %s", movies)
+        return cached
+
+    async def _set_cached_directors(self, directors):
+        """Writes fetched directors back to cache in a single pipeline.
+
+        Unknown directors ('N/A') are cached briefly, OMDB may fill them later.
+        """
+        if not directors:
+            return
+        try:
+            async with BaseRedis().connect() as redis_conn:
+                async with redis_conn.pipeline(transaction=False) as pipe:
+                    for _id, director in directors.items():
+                        pipe.set(
+                            self.director_cache_key(_id),
+                            codec.encode(director),
+                            ex=(
+                                curr_config.DIRECTOR_NEGATIVE_CACHE_TTL
+                                if director == "N/A"
+                                else curr_config.DIRECTOR_CACHE_TTL
+                            ),
+                        )
+                    await pipe.execute()
+        except Exception:
+            logger.exception("Unable to cache directors - %s", directors)
+
+    async def _fetch_director(self, movie_id, sem):
+        director = None
         try:
             logger.info("Fetching director for movie - %s", movie_id)
             request = copy.deepcopy(self.request)
             request["params"]["i"] = movie_id
             async with sem:
-                async with session.request(**request) as resp:
-                    resp.raise_for_status()
-                    response = await resp.json()
-                    logger.info("Response for movie director id - %s, response - %s", movie_id, response)
+                response, status_code = await self.send(request)
+            logger.info("Response for movie director id - %s, response - %s", movie_id, response)
+            if status_code == 200:
+                # OMDB responds 200 with an error for unknown movies
+                director = response.get("Director") or "N/A"
         except Exception:
             logger.exception("Unable to get director for movie - %s", movie_id)
 
-        return {"id": movie_id, "director": response.get("Director", "N/A")}
+        # director stays None on failures, so they are not cached
+        return {"id": movie_id, "director": director}
+
+    async def iter_directors(self, movies):
+        """Yields (movie id, director) as each director resolves.
+
+        Cached directors are yielded first, the rest are fetched concurrently
+        and cached in bulk once all the lookups complete.
+        """
+        movies = list(dict.fromkeys(movies))
+        cached = await self._get_cached_directors(movies)
+        missing = [_id for _id in movies if _id not in cached]
+        logger.info(
+            "Directors available in cache - %s, fetching - %s",
+            len(cached),
+            len(missing),
+        )
+        CacheStats.hit("directors", count=len(cached))
+        CacheStats.miss("directors", count=len(missing))
+        for _id, director in cached.items():
+            yield _id, director
+        if not missing:
+            return
+
+        sem = asyncio.Semaphore(curr_config.MAX_CONCURRENCY)
+        tasks = [
+            asyncio.ensure_future(self._fetch_director(_id, sem))
+            for _id in missing
+        ]
+        fetched = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                response = await next_done
+                if response["director"]:
+                    fetched[response["id"]] = response["director"]
+                yield response["id"], response["director"] or "N/A"
+        finally:
+            # consumer may stop early, like a disconnected stream
+            for task in tasks:
+                task.cancel()
+            await self._set_cached_directors(fetched)
 
     async def get_directors(self, movies):
         results = {}
         try:
             logger.info("Fetching directors for requested movies")
-            sem = asyncio.Semaphore(curr_config.MAX_CONCURRENCY)
-            async with aiohttp.ClientSession() as session:
-                tasks = [self._fetch_director(session, _id, sem) for _id in movies]
-                responses = await asyncio.gather(*tasks)
-            results = {
-                response["id"]: response["director"]
-                for response in responses
-                if isinstance(response, dict)
-            }
+            async for _id, director in self.iter_directors(movies):
+                results[_id] = director
             logger.info("Successfully fetched director details for requested movies")
         except Exception:
             logger.exception("Error while fetching directors for movies - %s", movies)
@@ -134,11 +527,58 @@ class OMDBConnector(ExternalConnector):
         return results
 
 
+class GeminiClient:
+    """
+    Process wide Gemini client shared by the W-2 tasks of a worker.
+
+    Requests go through one bounded httpx pool, reusing connections across
+    tasks instead of a new client & TLS handshakes per task. Opened on
+    worker startup and closed on shutdown, created lazily otherwise.
+    """
+
+    _client = None
+    _loop = None
+
+    @classmethod
+    def get(cls):
+        """Returns the shared client, (re)creating it for the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._loop is not loop:
+            # own pool, the default aiohttp one of the client is unbounded
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=curr_config.GEMINI_POOL_LIMIT,
+                    max_keepalive_connections=curr_config.GEMINI_POOL_LIMIT,
+                    keepalive_expiry=curr_config.GEMINI_KEEPALIVE_TIMEOUT,
+                ),
+            )
+            cls._client = Client(
+                api_key=curr_config.GEMINI_API_KEY,
+                http_options=types.HttpOptions(
+                    timeout=curr_config.GEMINI_TIMEOUT * 1000,  # milliseconds
+                    httpx_async_client=http_client,
+                ),
+            ).aio
+            cls._loop = loop
+            logger.info("Created shared Gemini client for the worker process")
+        return cls._client
+
+    @classmethod
+    async def close(cls):
+        client, cls._client, cls._loop = cls._client, None, None
+        if client:
+            try:
+                await client.aclose()
+                logger.info("Closed shared Gemini client")
+            except Exception:
+                logger.exception("Error while closing Gemini connection")
+
+
 class GeminiConnector:
     """Connector with Gemini client"""
 
     def __init__(self):
-        self.client = Client(api_key=curr_config.GEMINI_API_KEY).aio
+        self.client = GeminiClient.get()
 
     async def file_upload(self, filepath, file_type):
         try:
@@ -171,24 +611,66 @@ class GeminiConnector:
             logger.exception("Error occurred while processing the GEN AI request")
             return False, str(error)
 
-    async def close_connections(self):
-        try:
-            await self.client.close()
-        except Exception:
-            logger.exception("Error while closing Gemini connection")
-
 
 class BaseRedis:
     """Base Redis connector class
+
+    Borrows clients from a bounded connection pool shared by the worker
+    process, instead of opening a new connection per request.
     """
 
+    _pool = None
+    _loop = None
+
+    @classmethod
+    def get_pool(cls):
+        """Returns the shared pool, (re)creating it for the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._pool is None or cls._loop is not loop:
+            cls._pool = redis.BlockingConnectionPool(
+                host=REDIS_HOST,
+                port=6379,
+                db=0,
+                max_connections=curr_config.REDIS_MAX_CONNECTIONS,
+                timeout=curr_config.REDIS_POOL_TIMEOUT,
+                socket_timeout=curr_config.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=curr_config.REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=curr_config.REDIS_HEALTH_CHECK_INTERVAL,
+            )
+            cls._loop = loop
+            logger.info("Created shared redis connection pool for the worker process")
+        return cls._pool
+
+    @classmethod
+    async def close_pool(cls):
+        pool, cls._pool, cls._loop = cls._pool, None, None
+        if pool:
+            try:
+                await pool.aclose()
+                logger.info("Closed shared redis connection pool")
+            except Exception:
+                logger.exception("Error while closing shared redis connection pool")
+
     @asynccontextmanager
     async def connect(self):
-        conn = redis.Redis(host=REDIS_HOST, port=6379, db=0)
+        conn = redis.Redis(connection_pool=self.get_pool())
         try:
             yield conn
         finally:
             try:
+                # releases the borrowed connection, pool stays open
                 await conn.aclose()
             except RuntimeError:
-                pass
\ No newline at end of file
+                pass
+
+
+async def open_connections():
+    """Opens the shared connection pools, on ASGI startup."""
+    HTTPSession.get()
+    BaseRedis.get_pool()
+
+
+async def close_connections():
+    """Closes the shared connection pools, on ASGI shutdown."""
+    await HTTPSession.close()
+    await BaseRedis.close_pool()
@@ -0,0 +1,205 @@
+import random
+import asyncio
+import logging
+
+from collections import Counter
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+WORDS = [
+    "spider", "man", "batman", "star", "wars", "night", "dark", "knight", "love",
+    "story", "lost", "city", "return", "king", "last", "island", "blue", "river",
+    "iron", "storm", "ghost", "house", "dream", "road", "secret", "garden",
+    "shadow", "empire", "winter", "summer", "space", "time", "war", "world",
+]
+FIRST_NAMES = ["Sam", "Ava", "John", "Mia", "Raj", "Lena", "Omar", "Kate", "Ivan", "Yui"]
+LAST_NAMES = ["Raimi", "Nolan", "Lucas", "Kumar", "Smith", "Ito", "Diaz", "Berg", "Khan"]
+
+
+class Latency:
+    """
+    Latency distribution of the fake responses, in milliseconds.
+
+    Formats:
+        fixed:<ms>
+        uniform:<min ms>,<max ms>
+        lognormal:<median ms>,<sigma>
+        exp:<mean ms>
+    """
+
+    def __init__(self, spec="fixed:0", rng=None):
+        kind, _, args = spec.partition(":")
+        self.spec = spec
+        self.kind = kind
+        self.args = [float(arg) for arg in args.split(",") if arg]
+        self.rng = rng or random.Random()
+        if kind not in ("fixed", "uniform", "lognormal", "exp"):
+            raise ValueError(f"Unknown latency distribution - {spec}")
+
+    def sample(self):
+        """Returns latency of a response in seconds."""
+        if self.kind == "fixed":
+            ms = self.args[0] if self.args else 0
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(*self.args)
+        elif self.kind == "lognormal":
+            median, sigma = self.args
+            ms = median * self.rng.lognormvariate(0, sigma)
+        else:
+            ms = self.rng.expovariate(1 / self.args[0])
+        return max(ms, 0) / 1000
+
+
+class FakeOMDB:
+    """
+    Stand-in for the OMDB API with a synthetic catalog, to benchmark the
+    movies search without using the real OMDB quota.
+
+    Answers title searches (`s` & `page`) and movie lookups (`i`) in OMDB
+    response format, after a sampled latency. Errors are returned at the
+    error rate, and requests over the rate limit get 429. Counts the
+    requests received per kind & status.
+    """
+
+    def __init__(
+        self,
+        catalog_size=5000,
+        latency="fixed:50",
+        error_rate=0.0,
+        rate_limit=None,
+        missing_director_rate=0.05,
+        seed=42,
+    ):
+        """Initialize fake OMDB
+
+        Args:
+            catalog_size (int): Movies in the synthetic catalog.
+            latency (str): Latency distribution, see Latency.
+            error_rate (float): Fraction of requests answered with 500.
+            rate_limit (float): Requests per second before 429, None for no limit.
+            missing_director_rate (float): Fraction of movies with director 'N/A'.
+            seed (int): Seed of the catalog & the random errors.
+        """
+        self.rng = random.Random(seed)
+        self.latency = Latency(latency, rng=self.rng)
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.movies = self.make_catalog(catalog_size, missing_director_rate)
+        self.by_id = {movie["imdbID"]: movie for movie in self.movies}
+        self.counters = Counter()
+        self._tokens = rate_limit or 0
+        self._refilled_at = None
+        self._runner = None
+
+    def make_catalog(self, size, missing_director_rate):
+        movies = []
+        for index in range(size):
+            words = self.rng.sample(WORDS, self.rng.randint(1, 3))
+            director = (
+                "N/A"
+                if self.rng.random() < missing_director_rate
+                else f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            )
+            movies.append({
+                "Title": " ".join(word.title() for word in words),
+                "Year": str(self.rng.randint(1950, 2025)),
+                "imdbID": f"tt{index + 1:07d}",
+                "Type": "movie",
+                "Poster": "N/A",
+                "Director": director,
+            })
+        return movies
+
+    def search(self, query, page):
+        """Movies with all the words of the query in the title, OMDB format."""
+        words = query.casefold().split()
+        matches = [
+            movie for movie in self.movies
+            if all(word in movie["Title"].casefold() for word in words)
+        ]
+        results = matches[(page - 1) * 10:page * 10]
+        if not results:
+            return {"Response": "False", "Error": "Movie not found!"}
+        return {
+            "Search": [
+                {key: movie[key] for key in ("Title", "Year", "imdbID", "Type", "Poster")}
+                for movie in results
+            ],
+            "totalResults": str(len(matches)),
+            "Response": "True",
+        }
+
+    def lookup(self, imdb_id):
+        movie = self.by_id.get(imdb_id)
+        if movie is None:
+            return {"Response": "False", "Error": "Incorrect IMDb ID."}
+        return {**movie, "Response": "True"}
+
+    def allow(self):
+        """Token bucket of the rate limit, burst of a second of requests."""
+        if not self.rate_limit:
+            return True
+        now = asyncio.get_running_loop().time()
+        if self._refilled_at is not None:
+            elapsed = now - self._refilled_at
+            self._tokens = min(self.rate_limit, self._tokens + elapsed * self.rate_limit)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def handle(self, request):
+        params = request.query
+        kind = "lookup" if "i" in params else "search"
+        self.counters[kind] += 1
+        if not self.allow():
+            self.counters["status_429"] += 1
+            return web.json_response(
+                {"Response": "False", "Error": "Request limit reached!"}, status=429
+            )
+        await asyncio.sleep(self.latency.sample())
+        if self.rng.random() < self.error_rate:
+            self.counters["status_500"] += 1
+            return web.json_response(
+                {"Response": "False", "Error": "Internal error."}, status=500
+            )
+        self.counters["status_200"] += 1
+        if kind == "lookup":
+            return web.json_response(self.lookup(params["i"]))
+        try:
+            page = int(params.get("page", 1))
+        except ValueError:
+            page = 0
+        if not 0 < page <= 100:
+            return web.json_response(
+                {"Response": "False", "Error": "The offset specified in parameter 'page' is out of range."}
+            )
+        return web.json_response(self.search(params.get("s", ""), page))
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        return app
+
+    async def start(self, host="127.0.0.1", port=8081):
+        """Starts serving in the running loop, returns the base URL."""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        # port 0 binds to any free port
+        port = self._runner.addresses[0][1]
+        logger.info("Fake OMDB serving on %s:%s", host, port)
+        return f"http://{host}:{port}/"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def sample_queries(self, count):
+        """Search terms matching the catalog, to generate load with."""
+        words = [word for movie in self.movies for word in movie["Title"].split()]
+        return list(dict.fromkeys(self.rng.sample(words, min(count * 3, len(words)))))[:count]
@@ -0,0 +1,110 @@
+import json
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.benchmark import LoadTest, compare, load_baseline, save_baseline
+from app.cache import LRUCache
+from app.config import curr_config
+from app.connector import close_connections, open_connections
+from app.fake_omdb import FakeOMDB
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests the movies search API at a target rate against a fake "
+        "OMDB, reports latency percentiles, throughput, cache hit ratio & "
+        "upstream calls, and fails on regressions against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rps", type=float, default=50, help="Target requests per second.")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+        parser.add_argument(
+            "--queries", type=int, default=50, help="Distinct search terms in the mix."
+        )
+        parser.add_argument(
+            "--pages", type=int, default=3, help="Result pages per search term."
+        )
+        parser.add_argument(
+            "--omdb-url",
+            default=None,
+            help=(
+                "OMDB to run against, like a fake_omdb server. A fake OMDB is "
+                "started in process by default."
+            ),
+        )
+        parser.add_argument("--catalog-size", type=int, default=5000)
+        parser.add_argument("--latency", default="lognormal:80,0.5")
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--rate-limit", type=float, default=None)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--baseline", default=None, help="Baseline report (json) to compare with."
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Stores this run as the baseline instead of comparing.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed change from the baseline, as a fraction.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rps"] <= 0 or options["duration"] <= 0 or options["queries"] < 1:
+            raise CommandError("--rps, --duration and --queries should be positive")
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline requires --baseline path")
+
+        report = asyncio.run(self.run(options))
+        self.stdout.write(json.dumps(report, indent=2))
+
+        if not options["baseline"]:
+            return
+        if options["save_baseline"]:
+            save_baseline(options["baseline"], report)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline - {options['baseline']}"))
+            return
+        regressions = compare(report, load_baseline(options["baseline"]), options["tolerance"])
+        if regressions:
+            raise CommandError("Regressed against baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+
+    async def run(self, options):
+        # imported here, loads the django ASGI app
+        from task.asgi import application
+
+        fake_omdb = FakeOMDB(
+            catalog_size=options["catalog_size"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            rate_limit=options["rate_limit"],
+            seed=options["seed"],
+        )
+        omdb_url = curr_config.OMDB_URL
+        try:
+            if options["omdb_url"]:
+                curr_config.OMDB_URL = options["omdb_url"]
+            else:
+                curr_config.OMDB_URL = await fake_omdb.start(port=0)
+            await open_connections()
+            load_test = LoadTest(
+                application,
+                fake_omdb.sample_queries(options["queries"]),
+                rps=options["rps"],
+                duration=options["duration"],
+                pages=options["pages"],
+                seed=options["seed"],
+            )
+            return await load_test.run(
+                upstream_counters=None if options["omdb_url"] else fake_omdb.counters
+            )
+        finally:
+            curr_config.OMDB_URL = omdb_url
+            await LRUCache.close_all()
+            await close_connections()
+            await fake_omdb.stop()
@@ -0,0 +1,58 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from app.fake_omdb import FakeOMDB
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves a fake OMDB API with a synthetic catalog, point OMDB_URL to it "
+        "to benchmark movies search without the real OMDB quota."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8081)
+        parser.add_argument(
+            "--catalog-size", type=int, default=5000, help="Movies in the catalog."
+        )
+        parser.add_argument(
+            "--latency",
+            default="lognormal:80,0.5",
+            help=(
+                "Response latency in ms - fixed:<ms>, uniform:<min>,<max>, "
+                "lognormal:<median>,<sigma> or exp:<mean>."
+            ),
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Fraction of 500 responses."
+        )
+        parser.add_argument(
+            "--rate-limit",
+            type=float,
+            default=None,
+            help="Requests per second before responding 429, no limit by default.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        fake_omdb = FakeOMDB(
+            catalog_size=options["catalog_size"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            rate_limit=options["rate_limit"],
+            seed=options["seed"],
+        )
+        try:
+            asyncio.run(self.serve(fake_omdb, options["host"], options["port"]))
+        except KeyboardInterrupt:
+            self.stdout.write(f"Requests served - {dict(fake_omdb.counters)}")
+
+    async def serve(self, fake_omdb, host, port):
+        url = await fake_omdb.start(host, port)
+        self.stdout.write(self.style.SUCCESS(f"Fake OMDB serving on {url}"))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await fake_omdb.stop()
@@ -0,0 +1,95 @@
+import time
+import asyncio
+import logging
+
+from django.core.management.base import BaseCommand
+
+from app.config import curr_config
+from app.connector import close_connections
+from app.views import Movies, movies_popularity
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Warms the movies cache with the most popular search pages, "
+        "run after deploys or cache flushes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=curr_config.WARM_CACHE_TOP_N,
+            help="Number of most popular search pages to warm.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=curr_config.WARM_CACHE_CONCURRENCY,
+            help="Maximum pages fetched from OMDB at a time.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-fetch pages that are already fresh in cache.",
+        )
+
+    def handle(self, *args, **options):
+        if options["top"] < 1 or options["concurrency"] < 1:
+            self.stderr.write("--top and --concurrency should be positive")
+            return
+        stats = asyncio.run(
+            self.run(options["top"], options["concurrency"], options["force"])
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Warmed {warmed} of {total} pages in {duration:.2f} seconds "
+            "({cached} already cached, {failed} failed, {skipped} skipped "
+            "on exhausted rate limit)".format(**stats)
+        ))
+
+    async def run(self, top, concurrency, force):
+        try:
+            return await self.warm(top, concurrency, force)
+        finally:
+            await close_connections()
+
+    async def warm(self, top, concurrency, force):
+        """Fetches the most popular pages, a bounded number at a time.
+
+        Fetches go through the OMDB rate limiter like live traffic, warming
+        stops once the budget is exhausted, so live searches keep working.
+        """
+        started = time.monotonic()
+        stats = {"total": 0, "warmed": 0, "cached": 0, "failed": 0, "skipped": 0}
+        sem = asyncio.Semaphore(concurrency)
+        exhausted = asyncio.Event()
+
+        async def warm_page(member):
+            search_param, page = Movies.parse_popularity_member(member)
+            async with sem:
+                if exhausted.is_set():
+                    stats["skipped"] += 1
+                    return
+                try:
+                    status_code = await Movies.warm_page(search_param, page, force=force)
+                except Exception:
+                    logger.exception("Unable to warm page - %s", member)
+                    stats["failed"] += 1
+                    return
+            if status_code is None:
+                stats["cached"] += 1
+            elif status_code == 200:
+                stats["warmed"] += 1
+            else:
+                if status_code == 429:
+                    exhausted.set()
+                logger.info("Unable to warm page - %s, status - %s", member, status_code)
+                stats["failed"] += 1
+
+        members = await movies_popularity.top(top)
+        stats["total"] = len(members)
+        await asyncio.gather(*[warm_page(member) for member, _ in members])
+        stats["duration"] = time.monotonic() - started
+        return stats
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+def add_title_fulltext_index(apps, schema_editor):
+    # full-text search of titles is MySQL only, others search with LIKE
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE movie_catalog ADD FULLTEXT INDEX movie_catalog_title_ft (title)"
+        )
+
+
+def drop_title_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("ALTER TABLE movie_catalog DROP INDEX movie_catalog_title_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Movie",
+            fields=[
+                (
+                    "imdb_id",
+                    models.CharField(max_length=20, primary_key=True, serialize=False),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("year", models.CharField(blank=True, default="", max_length=20)),
+                ("director", models.CharField(max_length=255, null=True)),
+                ("created_dtm", models.DateTimeField(auto_now_add=True)),
+                ("modified_dtm", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "movie_catalog",
+            },
+        ),
+        migrations.RunPython(add_title_fulltext_index, drop_title_fulltext_index),
+    ]
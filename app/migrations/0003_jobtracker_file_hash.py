@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0002_movie"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobtracker",
+            name="file_hash",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobtracker",
+            name="source_job",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reused_by",
+                to="app.jobtracker",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobtracker",
+            index=models.Index(
+                fields=["file_hash", "status"], name="job_tracker_file_hash_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0003_jobtracker_file_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobtracker",
+            name="batch",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="children",
+                to="app.jobtracker",
+            ),
+        ),
+        migrations.AddField(
+            model_name="jobtracker",
+            name="batch_size",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="jobtracker",
+            name="file_name",
+            field=models.CharField(max_length=255, null=True),
+        ),
+    ]
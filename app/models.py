@@ -1,10 +1,14 @@
+import re
 import uuid
-import json
-import copy
-from django.db import models
+import hashlib
+from datetime import timedelta
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from django.utils.functional import cached_property
 
+from . import serializer
+
 
 class JobTracker(models.Model):
     """
@@ -27,11 +31,28 @@ class JobTracker(models.Model):
     created_dtm = models.DateTimeField(auto_now_add=True)
     modified_dtm = models.DateTimeField(auto_now=True)
     _task_result = models.JSONField(null=True, db_column="task_result")
+    # sha256 of the uploaded file, to reuse results of repeated uploads
+    file_hash = models.CharField(max_length=64, null=True)
+    # job holding the result, for uploads served from an earlier job
+    source_job = models.ForeignKey(
+        "self", null=True, on_delete=models.SET_NULL, related_name="reused_by"
+    )
+    # batch submissions - parent job with the count of files, child job per file
+    batch = models.ForeignKey(
+        "self", null=True, on_delete=models.CASCADE, related_name="children"
+    )
+    batch_size = models.PositiveIntegerField(null=True)
+    file_name = models.CharField(max_length=255, null=True)
 
     class Meta:
         db_table = "job_tracker"
+        indexes = [
+            models.Index(fields=["file_hash", "status"], name="job_tracker_file_hash_idx"),
+        ]
 
     MASKED_KEYS = ["employee_info.ssn", "employer_info.ein"]
+    # job result does not change once in these states
+    FINISHED_STATUSES = [Status.SUCCESS, Status.FAILED, Status.CANCELLED]
 
     @staticmethod
     def _mask_nested_keys(key, data):
@@ -50,9 +71,9 @@ class JobTracker(models.Model):
     def task_result(self):
         """Return masked details for app-level access."""
         data = {}
-        if self._task_result:
-            data = copy.deepcopy(self._task_result)
-            data = json.loads(self._task_result)
+        task_result = self.result_job._task_result
+        if task_result:
+            data = serializer.loads(task_result)
             for key in self.MASKED_KEYS:
                 self._mask_nested_keys(key, data)
         return data
@@ -64,16 +85,84 @@ class JobTracker(models.Model):
         self.status = status
         if status == self.Status.IN_PROGRESS:
             self.started_at = timezone.now()
-        elif status in [self.Status.SUCCESS, self.Status.FAILED, self.Status.CANCELLED]:
+        elif status in self.FINISHED_STATUSES:
             self.finished_at = timezone.now()
 
         for key, value in fields.items():
             setattr(self, key, value)
 
         await self.asave(
-            update_fields=["status", "started_at", "finished_at", *fields.keys()]
+            update_fields=[
+                "status", "started_at", "finished_at", "modified_dtm", *fields.keys()
+            ]
         )
 
+    @property
+    def result_job(self):
+        """Job holding the result, source job is expected to be fetched along."""
+        return self.source_job if self.source_job_id else self
+
+    @classmethod
+    async def afind_reusable(cls, file_hash, window):
+        """Returns the latest successful job of the same file within the window.
+
+        Args:
+            file_hash (str): sha256 of the uploaded file.
+            window (int): Seconds a successful result is reused for.
+        """
+        return await cls.objects.filter(
+            file_hash=file_hash,
+            status=cls.Status.SUCCESS,
+            source_job__isnull=True,
+            finished_at__gte=timezone.now() - timedelta(seconds=window),
+        ).order_by("-finished_at").afirst()
+
+    @classmethod
+    async def afind_reusable_many(cls, file_hashes, window):
+        """Latest successful jobs of the files within the window, by file hash."""
+        jobs = cls.objects.filter(
+            file_hash__in=set(file_hashes),
+            status=cls.Status.SUCCESS,
+            source_job__isnull=True,
+            finished_at__gte=timezone.now() - timedelta(seconds=window),
+        ).order_by("finished_at")
+        # later jobs overwrite earlier ones of the same file
+        return {job.file_hash: job async for job in jobs}
+
+    @property
+    def is_batch(self):
+        return self.batch_size is not None
+
+    async def aprogress(self):
+        """
+        Counts of the child jobs of a batch by status. The batch is marked in
+        progress once any child starts, and finished once all children are.
+        """
+        counts = dict.fromkeys(self.Status.values, 0)
+        async for row in self.children.values("status").annotate(total=models.Count("id")):
+            counts[row["status"]] = row["total"]
+        if self.is_finished:
+            return counts
+
+        finished = sum(counts[status] for status in self.FINISHED_STATUSES)
+        if finished >= self.batch_size:
+            await self.amark(
+                self.Status.SUCCESS if counts[self.Status.SUCCESS] else self.Status.FAILED
+            )
+        elif self.status == self.Status.QUEUED and (finished or counts[self.Status.IN_PROGRESS]):
+            await self.amark(self.Status.IN_PROGRESS)
+        return counts
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    @property
+    def etag(self):
+        """Strong ETag of the job details, changes on every update of the job."""
+        version = f"{self.id.hex}|{self.status}|{self.modified_dtm.isoformat()}"
+        return f'"{hashlib.sha256(version.encode()).hexdigest()[:32]}"'
+
     def __str__(self):
         return f"{self.id} ({self.status})"
 
@@ -89,3 +178,84 @@ class JobTracker(models.Model):
             },
             "result": result,
         }
+
+
+class Movie(models.Model):
+    """
+    Local catalog of movies seen in OMDB responses, to answer searches
+    without calling the provider.
+    """
+
+    imdb_id = models.CharField(max_length=20, primary_key=True)
+    title = models.CharField(max_length=255)
+    year = models.CharField(max_length=20, blank=True, default="")
+    director = models.CharField(max_length=255, null=True)
+    created_dtm = models.DateTimeField(auto_now_add=True)
+    modified_dtm = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "movie_catalog"
+
+    def __str__(self):
+        return f"{self.imdb_id} ({self.title})"
+
+    @classmethod
+    async def aupsert(cls, movies, directors=None):
+        """
+        Adds / updates movies from OMDB search results, directors are only
+        updated when known, so failed lookups do not overwrite them.
+        """
+        directors = directors or {}
+        with_director, without_director = [], []
+        for movie in movies:
+            director = directors.get(movie["imdbID"])
+            row = cls(
+                imdb_id=movie["imdbID"],
+                title=movie["Title"][:255],
+                year=movie.get("Year", ""),
+                director=director if director and director != "N/A" else None,
+            )
+            (with_director if row.director else without_director).append(row)
+
+        unique_fields = None
+        if connection.features.supports_update_conflicts_with_target:
+            unique_fields = ["imdb_id"]
+        for rows, update_fields in [
+            (with_director, ["title", "year", "director", "modified_dtm"]),
+            (without_director, ["title", "year", "modified_dtm"]),
+        ]:
+            if rows:
+                await cls.objects.abulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=update_fields,
+                )
+
+    @classmethod
+    async def asearch(cls, query, offset=0, limit=10):
+        """
+        Full-text search of titles, every word of the query has to match
+        (prefix match), ranked by relevance. Databases other than MySQL have
+        no full-text index, titles containing every word are matched there,
+        in order of title.
+
+        Returns:
+            tuple(list, int): Movies in the requested slice, total matches.
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return [], 0
+        if connection.vendor == "mysql":
+            terms = " ".join(f"+{word}*" for word in words)
+            match = RawSQL("MATCH (title) AGAINST (%s IN BOOLEAN MODE)", (terms,))
+            queryset = cls.objects.annotate(score=match).filter(score__gt=0)
+            queryset = queryset.order_by("-score", "title")
+        else:
+            queryset = cls.objects.all()
+            for word in words:
+                queryset = queryset.filter(title__icontains=word)
+            queryset = queryset.order_by("title")
+        total = await queryset.acount()
+        movies = [movie async for movie in queryset[offset:offset + limit]]
+        return movies, total
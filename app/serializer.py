@@ -0,0 +1,119 @@
+import json
+import uuid
+import decimal
+import datetime
+
+from .config import curr_config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RawJSON(bytes):
+    """Pre-serialized JSON value, embedded as is instead of parsed & dumped again."""
+
+
+def _default(value):
+    """Serializes values JSON does not support, like DjangoJSONEncoder.
+
+    Times are trimmed to milliseconds, as DjangoJSONEncoder does.
+    """
+    if isinstance(value, datetime.datetime):
+        data = value.isoformat()
+        if value.microsecond:
+            data = data[:23] + data[26:]
+        if data.endswith("+00:00"):
+            data = data.removesuffix("+00:00") + "Z"
+        return data
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, datetime.time):
+        data = value.isoformat()
+        return data[:12] if value.microsecond else data
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONSerializer:
+    """
+    Stdlib JSON serializer, dumps to compact UTF-8 bytes.
+
+    Handles datetimes, UUIDs, decimals & bytes, and embeds RawJSON values
+    without parsing them.
+    """
+
+    name = "json"
+
+    def dumps(self, value):
+        raw_values = []
+        # placeholder of raw values, swapped with the raw bytes once dumped
+        marker = uuid.uuid4().hex
+
+        def default(obj):
+            if isinstance(obj, RawJSON):
+                raw_values.append(obj)
+                return f"{marker}:{len(raw_values) - 1}"
+            return _default(obj)
+
+        if isinstance(value, RawJSON):
+            return bytes(value)
+        data = json.dumps(
+            value, default=default, separators=(",", ":"), ensure_ascii=False
+        ).encode()
+        for index, raw in enumerate(raw_values):
+            data = data.replace(f'"{marker}:{index}"'.encode(), raw, 1)
+        return data
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """orjson serializer, several times faster than stdlib for large values."""
+
+    name = "orjson"
+    # datetimes are passed to _default, for the same format as stdlib
+    OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, RawJSON):
+            return orjson.Fragment(bytes(value))
+        return _default(value)
+
+    def dumps(self, value):
+        if isinstance(value, RawJSON):
+            return bytes(value)
+        return orjson.dumps(value, default=self._default, option=self.OPTIONS)
+
+    def loads(self, data):
+        # orjson does not accept bytes subclasses
+        return orjson.loads(bytes(data) if isinstance(data, RawJSON) else data)
+
+
+SERIALIZERS = {
+    JSONSerializer.name: JSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+}
+
+
+def get_serializer(name=None):
+    """Returns the serializer by name, defaults to Config.JSON_SERIALIZER.
+
+    Falls back to stdlib serializer when orjson is not installed.
+    """
+    name = name or curr_config.JSON_SERIALIZER
+    if name == OrjsonSerializer.name and not orjson:
+        name = JSONSerializer.name
+    return SERIALIZERS[name]()
+
+
+# serializer of responses & cache values
+serializer = get_serializer()
+dumps = serializer.dumps
+loads = serializer.loads
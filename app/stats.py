@@ -0,0 +1,23 @@
+from collections import Counter
+
+
+class CacheStats:
+    """Process wide hit / miss counters, per cache tier."""
+
+    _counters = Counter()
+
+    @classmethod
+    def hit(cls, tier, count=1):
+        cls._counters[f"{tier}.hits"] += count
+
+    @classmethod
+    def miss(cls, tier, count=1):
+        cls._counters[f"{tier}.misses"] += count
+
+    @classmethod
+    def snapshot(cls):
+        return dict(cls._counters)
+
+    @classmethod
+    def reset(cls):
+        cls._counters.clear()
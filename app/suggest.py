@@ -0,0 +1,149 @@
+import re
+import time
+import heapq
+import asyncio
+import logging
+
+from bisect import bisect_left, insort
+
+from .config import curr_config
+from .codec import normalize
+from .connector import BaseRedis
+
+logger = logging.getLogger(__name__)
+
+
+class TitleIndex:
+    """
+    In-process prefix index of movie titles for search suggestions.
+
+    Titles are kept in a sorted array of normalized keys, one key per word
+    of the title, so a prefix matches the start of any word. Lookups bisect
+    to the first match and rank the matches by popularity, no upstream or
+    redis calls on the request path.
+
+    Titles & popularity are shared through a redis sorted set, loaded in
+    batches on first use and reloaded periodically in background. Both keep
+    the max_titles most popular titles only.
+    """
+
+    def __init__(self, key="suggest:titles", max_titles=None):
+        self.key = key
+        self.max_titles = max_titles or curr_config.SUGGEST_MAX_TITLES
+        self._entries = []  # sorted (normalized key, title)
+        self._scores = {}  # title -> popularity
+        self._loaded_at = None
+        self._loader = None
+        self._redis = BaseRedis()
+
+    def __len__(self):
+        return len(self._scores)
+
+    @staticmethod
+    def _keys(title):
+        """Normalized keys of the title, starting from each word."""
+        words = normalize(re.sub(r"[^\w\s]", " ", title)).split()
+        return {" ".join(words[index:]) for index in range(len(words))}
+
+    def add(self, titles):
+        """Adds titles with popularity scores to the index.
+
+        Args:
+            titles (dict): Title to popularity, scores of known titles are
+                kept at the highest value seen.
+        """
+        new_entries = []
+        for title, score in titles.items():
+            if title not in self._scores:
+                new_entries.extend((key, title) for key in self._keys(title))
+            self._scores[title] = max(score, self._scores.get(title, 0))
+        if len(new_entries) > 10:
+            self._entries.extend(new_entries)
+            self._entries.sort()
+        else:
+            for entry in new_entries:
+                insort(self._entries, entry)
+        if len(self._scores) > self.max_titles:
+            self.trim()
+
+    def trim(self):
+        """Drops the least popular titles, down to 90% of max_titles.
+
+        The headroom left for new titles keeps the index from being
+        rebuilt on every record once full.
+        """
+        kept = heapq.nlargest(
+            self.max_titles * 9 // 10,
+            self._scores,
+            key=lambda title: (self._scores[title], title),
+        )
+        self._scores = {title: self._scores[title] for title in kept}
+        self._entries = [entry for entry in self._entries if entry[1] in self._scores]
+
+    def suggest(self, prefix, limit=10):
+        """Returns most popular titles having a word starting with the prefix."""
+        self.ensure_loaded()
+        prefix = normalize(re.sub(r"[^\w\s]", " ", prefix))
+        if not prefix:
+            return []
+        matches = set()
+        index = bisect_left(self._entries, (prefix,))
+        max_scan = curr_config.SUGGEST_MAX_SCAN
+        while index < len(self._entries) and len(matches) < max_scan:
+            key, title = self._entries[index]
+            if not key.startswith(prefix):
+                break
+            matches.add(title)
+            index += 1
+        return heapq.nlargest(limit, matches, key=lambda title: (self._scores[title], title))
+
+    async def record(self, titles):
+        """Records served titles, bumping their popularity here & in redis."""
+        titles = list(dict.fromkeys(titles))
+        if not titles:
+            return
+        self.add({title: self._scores.get(title, 0) + 1 for title in titles})
+        try:
+            async with self._redis.connect() as redis_conn:
+                async with redis_conn.pipeline(transaction=False) as pipe:
+                    for title in titles:
+                        pipe.zincrby(self.key, 1, title)
+                    pipe.zremrangebyrank(self.key, 0, -(self.max_titles + 1))
+                    await pipe.execute()
+        except Exception:
+            logger.exception("Unable to record titles for suggestions")
+
+    async def load(self):
+        """Loads titles from redis in batches, without blocking the loop."""
+        started = time.monotonic()
+        try:
+            cursor = 0
+            async with self._redis.connect() as redis_conn:
+                while True:
+                    cursor, items = await redis_conn.zscan(
+                        self.key, cursor, count=curr_config.SUGGEST_LOAD_BATCH
+                    )
+                    self.add({title.decode(): score for title, score in items})
+                    if not cursor:
+                        break
+                    await asyncio.sleep(0)
+            logger.info(
+                "Loaded %s titles for suggestions in %.3f seconds",
+                len(self),
+                time.monotonic() - started,
+            )
+        except Exception:
+            logger.exception("Unable to load titles for suggestions")
+
+    def ensure_loaded(self):
+        """Schedules a (re)load from redis on first use & once stale."""
+        if self._loader and not self._loader.done():
+            return
+        now = time.monotonic()
+        if self._loaded_at and now < self._loaded_at + curr_config.SUGGEST_RELOAD_INTERVAL:
+            return
+        self._loaded_at = now
+        self._loader = asyncio.ensure_future(self.load())
+
+
+title_index = TitleIndex()
@@ -0,0 +1,474 @@
+import os
+import uuid
+import hashlib
+import logging
+import zipfile
+import aiofiles
+
+from dataclasses import dataclass
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
+
+from task.settings import TMP_DIR
+from .config import curr_config
+
+logger = logging.getLogger(__name__)
+
+# scope key of the upload streamed to disk, read by the view
+STREAMED_UPLOAD = "w2_upload"
+# scope key of the Idempotency-Key reservation made before streaming
+IDEMPOTENCY_RESERVATION = "w2_idempotency"
+
+MISSING_FILE = "W-2 form missing in request, Upload form to proceed."
+INVALID_FILE_TYPE = "Invalid file format, Allowed Types (.png, .jpeg, .pdf)."
+
+# leading bytes of the allowed file types
+MAGIC_BYTES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"%PDF-", "application/pdf"),
+]
+MAGIC_LENGTH = 12
+ZIP_TYPES = ["application/zip", "application/x-zip-compressed"]
+
+
+def detect_file_type(head):
+    """Returns mime type of the file from its leading bytes, None if unknown."""
+    for magic, mime_type in MAGIC_BYTES:
+        if head.startswith(magic):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+    @classmethod
+    def too_large(cls, max_size):
+        return cls(
+            f"W-2 form too large, Maximum size is {max_size // (1024 * 1024)} MB.",
+            status_code=413,
+        )
+
+
+@dataclass
+class StreamedUpload:
+    """W-2 file streamed to TMP_DIR, or the error that stopped the upload."""
+
+    id: str
+    name: str = None
+    path: str = None
+    content_type: str = None
+    size: int = 0
+    sha256: str = None
+    error: str = None
+    status_code: int = 200
+
+
+async def save_w2_file(w2_form):
+    """Copies a W-2 file parsed by Django to TMP_DIR, hashing it along.
+
+    Args:
+        w2_form (UploadedFile): Uploaded W-2 file.
+    Returns:
+        StreamedUpload: Saved file.
+    """
+    upload = StreamedUpload(
+        id=uuid.uuid4().hex, name=w2_form.name, content_type=w2_form.content_type
+    )
+    upload.path = os.path.join(TMP_DIR, f"{upload.id[:6]}_{w2_form.name}")
+    logger.info("Saving W2 form in path '%s'", upload.path)
+    file_hash = hashlib.sha256()
+    async with aiofiles.open(upload.path, "wb+") as destination:
+        for chunk in w2_form.chunks():
+            file_hash.update(chunk)
+            upload.size += len(chunk)
+            await destination.write(chunk)
+    upload.sha256 = file_hash.hexdigest()
+    return upload
+
+
+def is_archive(w2_form):
+    return w2_form.content_type in ZIP_TYPES or w2_form.name.lower().endswith(".zip")
+
+
+@sync_to_async
+def extract_w2_archive(archive, max_files, max_size):
+    """Writes the W-2 files of a zip archive to TMP_DIR.
+
+    Types are checked from the magic bytes, as archives carry no content
+    types. Directories & hidden files are skipped.
+
+    Args:
+        archive (UploadedFile): Zip archive.
+        max_files (int): Files allowed in the archive.
+        max_size (int): Bytes allowed per file, after decompression.
+    Returns:
+        list(StreamedUpload): Extracted files.
+    Raises:
+        UploadError: Invalid archive, or any file of invalid type / size, no
+            file is kept then.
+    """
+    uploads = []
+    try:
+        with zipfile.ZipFile(archive) as zip_file:
+            members = [
+                info for info in zip_file.infolist()
+                if not info.is_dir()
+                and not info.filename.startswith("__MACOSX/")
+                and not os.path.basename(info.filename).startswith(".")
+            ]
+            if len(members) > max_files:
+                raise UploadError(f"Too many W-2 forms, Maximum is {max_files} per batch.")
+            for info in members:
+                uploads.append(extract_member(zip_file, info, max_size))
+    except Exception as exc:
+        for upload in uploads:
+            os.remove(upload.path)
+        if isinstance(exc, zipfile.BadZipFile):
+            raise UploadError("Invalid zip archive.") from exc
+        raise
+    return uploads
+
+
+def extract_member(zip_file, info, max_size):
+    name = os.path.basename(info.filename)
+    if info.file_size > max_size:
+        raise UploadError(f"{name} - {UploadError.too_large(max_size).message}", 413)
+    try:
+        name = get_valid_filename(name[-100:])
+    except SuspiciousFileOperation:
+        name = "w2"
+    upload = StreamedUpload(id=uuid.uuid4().hex, name=name)
+    path = os.path.join(TMP_DIR, f"{upload.id[:6]}_{name}")
+    file_hash = hashlib.sha256()
+    with zip_file.open(info) as source:
+        chunk = source.read(MAGIC_LENGTH)
+        upload.content_type = detect_file_type(chunk)
+        if upload.content_type not in curr_config.ALLOWED_FILE_TYPES:
+            raise UploadError(f"{name} - {INVALID_FILE_TYPE}")
+        try:
+            with open(path, "wb") as destination:
+                while chunk:
+                    # sizes in the archive are not trusted
+                    upload.size += len(chunk)
+                    if upload.size > max_size:
+                        raise UploadError(
+                            f"{name} - {UploadError.too_large(max_size).message}", 413
+                        )
+                    file_hash.update(chunk)
+                    destination.write(chunk)
+                    chunk = source.read(64 * 1024)
+        except Exception:
+            os.remove(path)
+            raise
+    upload.path = path
+    upload.sha256 = file_hash.hexdigest()
+    return upload
+
+
+class MultipartStream:
+    """
+    Incremental multipart/form-data parser, fed with body chunks as they
+    arrive. Data of the parts is passed on as is, holding back only enough
+    bytes to find a boundary split across chunks.
+    """
+
+    MAX_HEADERS_SIZE = 8 * 1024
+
+    def __init__(self, boundary, on_part, on_data):
+        """Initialize parser
+
+        Args:
+            boundary (bytes): Boundary from the content type.
+            on_part (callable): Coroutine function called with the headers
+                (dict) of every part before its data.
+            on_data (callable): Coroutine function called with data chunks
+                of the current part, and b"" once the part ends.
+        """
+        self.delimiter = b"--" + boundary
+        self.separator = b"\r\n" + self.delimiter
+        self.on_part = on_part
+        self.on_data = on_data
+        self.buffer = b""
+        self.state = "preamble"
+
+    @staticmethod
+    def parse_headers(raw):
+        headers = {}
+        for line in raw.decode("utf-8", "replace").split("\r\n"):
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    async def feed(self, chunk):
+        self.buffer += chunk
+        while True:
+            if self.state == "preamble":
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    self.buffer = self.buffer[-len(self.delimiter):]
+                    return
+                self.buffer = self.buffer[index + len(self.delimiter):]
+                self.state = "after_delimiter"
+            elif self.state == "after_delimiter":
+                if len(self.buffer) < 2:
+                    return
+                if self.buffer.startswith(b"--"):
+                    self.state = "done"
+                    return
+                self.buffer = self.buffer[2:]
+                self.state = "headers"
+            elif self.state == "headers":
+                index = self.buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(self.buffer) > self.MAX_HEADERS_SIZE:
+                        raise UploadError("Invalid multipart request.")
+                    return
+                await self.on_part(self.parse_headers(self.buffer[:index]))
+                self.buffer = self.buffer[index + 4:]
+                self.state = "data"
+            elif self.state == "data":
+                index = self.buffer.find(self.separator)
+                if index < 0:
+                    # boundary may start in the held back tail
+                    keep = len(self.separator) - 1
+                    if len(self.buffer) > keep:
+                        await self.on_data(self.buffer[:-keep])
+                        self.buffer = self.buffer[-keep:]
+                    return
+                if index:
+                    await self.on_data(self.buffer[:index])
+                await self.on_data(b"")
+                self.buffer = self.buffer[index + len(self.separator):]
+                self.state = "after_delimiter"
+            else:
+                return
+
+    @property
+    def done(self):
+        return self.state == "done"
+
+
+class W2UploadReceiver:
+    """
+    Writes the file of a multipart W-2 upload to TMP_DIR as the body
+    arrives, hashing it along. The file type is checked from the magic
+    bytes of the first chunk, and the upload stops on the first type or
+    size violation.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.upload = StreamedUpload(id=uuid.uuid4().hex)
+        self._hash = hashlib.sha256()
+        self._file = None
+        self._head = b""
+        self._field = None
+
+    async def on_part(self, headers):
+        disposition = headers.get("content-disposition", "")
+        params = {}
+        for item in disposition.split(";")[1:]:
+            key, _, value = item.strip().partition("=")
+            params[key.lower()] = value.strip('"')
+        self._field = params.get("name")
+        if self._field != "file" or self.upload.path:
+            # other fields are not used by the upload API
+            self._field = None
+            return
+        name = os.path.basename(params.get("filename", "").replace("\\", "/"))
+        try:
+            self.upload.name = get_valid_filename(name[-100:])
+        except SuspiciousFileOperation:
+            self.upload.name = "w2"
+        self.upload.path = os.path.join(TMP_DIR, f"{self.upload.id[:6]}_{self.upload.name}")
+
+    async def on_data(self, data):
+        if self._field != "file":
+            return
+        part_end = not data
+        if self.upload.content_type is None:
+            # type is checked once the magic bytes are in
+            self._head += data
+            if len(self._head) < MAGIC_LENGTH and not part_end:
+                return
+            content_type = detect_file_type(self._head)
+            if content_type not in curr_config.ALLOWED_FILE_TYPES:
+                logger.info("Invalid w2 form type from magic bytes - %s", self._head[:8])
+                raise UploadError(INVALID_FILE_TYPE)
+            self.upload.content_type = content_type
+            self._file = await aiofiles.open(self.upload.path, "wb")
+            data, self._head = self._head, b""
+        if data:
+            self.upload.size += len(data)
+            if self.upload.size > self.max_size:
+                raise UploadError.too_large(self.max_size)
+            self._hash.update(data)
+            await self._file.write(data)
+        if part_end:
+            await self.close()
+
+    async def close(self):
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        if self.upload.content_type and not self.upload.error:
+            self.upload.sha256 = self._hash.hexdigest()
+
+    async def abort(self, error):
+        """Drops the partly written file, keeping the error for the view."""
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        if self.upload.path and os.path.exists(self.upload.path):
+            os.remove(self.upload.path)
+        self.upload.path = None
+        self.upload.error = error.message
+        self.upload.status_code = error.status_code
+
+
+class StreamingUploadApp:
+    """
+    ASGI app streaming W-2 uploads straight to disk, in front of Django.
+
+    Django reads the whole request body into memory or a temp file before
+    the view runs. For multipart POSTs to the W-2 API, the body is instead
+    written to TMP_DIR in a single pass. Django gets an empty body, and the
+    StreamedUpload in the scope under STREAMED_UPLOAD. Other requests are
+    passed on untouched.
+
+    With idempotency keys, the Idempotency-Key of the request is reserved
+    before the body is read. Replays & duplicates of a request in progress
+    are passed on with the reservation under IDEMPOTENCY_RESERVATION and
+    their file is discarded unread, it is not written to disk.
+    """
+
+    def __init__(self, app, path, max_size=None, idempotency=None):
+        self.app = app
+        self.path = path.rstrip("/")
+        self.max_size = max_size or curr_config.W2_MAX_UPLOAD_SIZE
+        self.idempotency = idempotency
+
+    def is_upload(self, scope):
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"].rstrip("/") == self.path
+        )
+
+    @staticmethod
+    def get_boundary(headers):
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        media_type, *params = content_type.split(";")
+        if media_type.strip().lower() != "multipart/form-data":
+            return None
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "boundary" and value:
+                return value.strip('"').encode("latin-1")
+        return None
+
+    def get_idempotency_key(self, headers):
+        """Returns the valid Idempotency-Key of the request, None otherwise.
+
+        Invalid keys are left to the view to reject.
+        """
+        if self.idempotency is None or b"idempotency-key" not in headers:
+            return None
+        key = headers[b"idempotency-key"].decode("latin-1")
+        if not 0 < len(key) <= curr_config.IDEMPOTENCY_KEY_MAX_LENGTH:
+            return None
+        return key
+
+    async def receive_upload(self, headers, boundary, receive):
+        """Reads the body from receive, writing the file as it arrives.
+
+        Returns:
+            tuple(StreamedUpload, bool): Upload (None if the client
+                disconnected), True if the body was fully read.
+        """
+        receiver = W2UploadReceiver(self.max_size)
+        parser = MultipartStream(boundary, receiver.on_part, receiver.on_data)
+        try:
+            content_length = int(headers.get(b"content-length", 0))
+            if content_length > self.max_size + MultipartStream.MAX_HEADERS_SIZE:
+                raise UploadError.too_large(self.max_size)
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    logger.info("Client disconnected during w2 upload")
+                    await receiver.abort(UploadError("Upload aborted."))
+                    return None, True
+                more_body = message.get("more_body", False)
+                if not parser.done:
+                    await parser.feed(message.get("body", b""))
+            if not receiver.upload.sha256:
+                raise UploadError(MISSING_FILE)
+        except UploadError as error:
+            await receiver.abort(error)
+            return receiver.upload, False
+        except Exception:
+            logger.exception("Error while streaming w2 upload")
+            await receiver.abort(UploadError("Invalid multipart request."))
+            return receiver.upload, False
+        finally:
+            await receiver.close()
+        return receiver.upload, True
+
+    async def __call__(self, scope, receive, send):
+        if not self.is_upload(scope):
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers", []))
+        boundary = self.get_boundary(headers)
+        if boundary is None:
+            return await self.app(scope, receive, send)
+
+        idempotency_key = self.get_idempotency_key(headers)
+        reservation = None
+        if idempotency_key is not None:
+            reservation = await self.idempotency.reserve(idempotency_key)
+
+        if reservation is not None and reservation[0] is None:
+            # answered from the earlier request, the file is not needed
+            logger.info("Skipped w2 upload for idempotency key - %s", idempotency_key)
+            upload, body_read = None, False
+        else:
+            upload, body_read = await self.receive_upload(headers, boundary, receive)
+            if upload is None:
+                if reservation is not None:
+                    await self.idempotency.release(idempotency_key, reservation[0])
+                return
+            logger.info("Streamed w2 upload - %s", upload)
+        body_sent = False
+
+        async def empty_receive():
+            nonlocal body_sent, body_read
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # rest of an aborted upload is discarded, only disconnect is passed on
+            while True:
+                message = await receive()
+                if body_read or message["type"] != "http.request":
+                    return message
+                body_read = not message.get("more_body", False)
+
+        scope = {
+            **scope,
+            "headers": [
+                (name, value)
+                for name, value in scope.get("headers", [])
+                if name not in (b"content-type", b"content-length")
+            ] + [(b"content-length", b"0")],
+            STREAMED_UPLOAD: upload,
+            IDEMPOTENCY_RESERVATION: reservation,
+        }
+        return await self.app(scope, empty_receive, send)
@@ -1,10 +1,14 @@
 from django.urls import path
 from . import views
-from .views import W2Intelligence, Movies
+from .views import W2Intelligence, W2Batch, Movies, MovieSuggest
 
 urlpatterns = [
     path('ping', views.ping, name="ping"),
+    path('metrics/cache', views.cache_metrics, name="cache_metrics"),
     path('w2', W2Intelligence.as_view(), name="w2_process"),
+    path('w2/batch', W2Batch.as_view(), name="w2_batch"),
+    path('w2/batch/<str:batch_id>/', W2Batch.as_view(), name="w2_batch_response"),
     path('w2/<str:job_id>/', W2Intelligence.as_view(), name="w2_response"),
-    path('movies', Movies.as_view(), name="movies")
+    path('movies', Movies.as_view(), name="movies"),
+    path('movies/suggest', MovieSuggest.as_view(), name="movies_suggest"),
 ]
@@ -1,28 +1,85 @@
 import os
 import math
-import json
+import time
 import uuid
+import asyncio
+import hashlib
 import logging
-import aiofiles
+
+from functools import partial
 
 from django.core import exceptions
-from django.http import HttpResponse, JsonResponse
+from django.db.models import Q
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.views import View
-from task.settings import TMP_DIR
 from .config import curr_config
-from .workers import process_w2_forms, form_error_response
-from .models import JobTracker
-from .connector import BaseRedis, OMDBConnector
+from .workers import cleanup, enqueue_w2_batch, process_w2_forms, form_error_response
+from .models import JobTracker, Movie
+from .connector import BaseRedis, OMDBConnector, omdb_rate_limiter
+from .cache import CacheStats, IdempotencyKeys, LRUCache, Popularity, SingleFlight
+from .codec import codec, make_cache_key, normalize
+from .serializer import RawJSON, serializer
+from .suggest import title_index
+from .uploads import (
+    IDEMPOTENCY_RESERVATION,
+    INVALID_FILE_TYPE,
+    MISSING_FILE,
+    STREAMED_UPLOAD,
+    UploadError,
+    extract_w2_archive,
+    is_archive,
+    save_w2_file,
+)
 
 logger = logging.getLogger(__name__)
 # common redis for cache
 redis = BaseRedis()
+# coalesces concurrent movie searches of the same key
+movies_flight = SingleFlight("movies")
+# in-process cache of hot movie results, in front of redis
+movies_l1 = LRUCache(
+    "movies",
+    ttl=curr_config.MOVIES_L1_TTL,
+    max_items=curr_config.MOVIES_L1_MAX_ITEMS,
+    max_bytes=curr_config.MOVIES_L1_MAX_BYTES,
+)
+# popularity of searched pages, for cache warming
+movies_popularity = Popularity(
+    "popularity:movies",
+    half_life=curr_config.MOVIES_POPULARITY_HALF_LIFE,
+    max_members=curr_config.MOVIES_POPULARITY_MAX_KEYS,
+)
+# idempotency keys of W-2 submissions
+w2_idempotency = IdempotencyKeys(
+    "idempotency:w2", ttl=curr_config.W2_IDEMPOTENCY_TTL
+)
+# holds references of fire & forget tasks till they complete
+background_tasks = set()
+
+
+def run_in_background(coro):
+    task = asyncio.ensure_future(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
 
 async def ping(request):
     return HttpResponse("Hey, There!!")
 
 
+def json_response(body, status_code=200):
+    """Forms JSON response of the serialized body."""
+    return HttpResponse(body, content_type="application/json", status=status_code)
+
+
 def form_json_response(status, status_code=200, addl_resp=None, error_message=None):
     response = {"status": status, "status_code": status_code}
     if addl_resp and not isinstance(addl_resp, dict):
@@ -34,7 +91,41 @@ def form_json_response(status, status_code=200, addl_resp=None, error_message=No
         response.update(error_resp)
     elif addl_resp:
         response.update(addl_resp)
-    return JsonResponse(response, status=status_code)
+    return json_response(serializer.dumps(response), status_code=status_code)
+
+
+def etag_matches(request, etag):
+    """Returns True if If-None-Match of the request matches the ETag."""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    # weak comparison, as required for If-None-Match
+    etag = etag.removeprefix("W/")
+    return "*" in etags or any(tag.removeprefix("W/") == etag for tag in etags)
+
+
+def set_cache_headers(response, etag, cache_control):
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def conditional_response(request, response, cache_control):
+    """Adds ETag (hash of the body) & Cache-Control to the response, 304
+    without body if the client copy is current.
+
+    Args:
+        request (HttpRequest): Request, checked for If-None-Match.
+        response (HttpResponse): Full response.
+        cache_control (str): Cache-Control header of the response.
+    Returns:
+        HttpResponse: Full response, or 304 when not modified.
+    """
+    etag = f'"{hashlib.sha256(response.content).hexdigest()[:32]}"'
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    return set_cache_headers(response, etag, cache_control)
 
 
 class W2Intelligence(View):
@@ -42,9 +133,51 @@ class W2Intelligence(View):
     Class view to handle W2 form parsing.
     """
 
+    @staticmethod
+    def result_cache_key(job):
+        """Cache key of the serialized details of a job version."""
+        return make_cache_key("w2-result", job.etag)
+
+    @classmethod
+    async def job_response(cls, job):
+        """Forms the job details response.
+
+        Details of finished jobs never change, they are cached serialized
+        and sent as is, without masking & serializing the result again.
+        """
+        if not job.is_finished:
+            return form_json_response(job.status, status_code=200, addl_resp=job.to_dict())
+
+        cache_key = cls.result_cache_key(job)
+        try:
+            async with redis.connect() as redis_conn:
+                body = codec.decode_raw(await redis_conn.get(cache_key))
+        except Exception:
+            logger.exception("Unable to read job details from cache - %s", job)
+            body = None
+        if body is not None:
+            CacheStats.hit("w2-result")
+            return json_response(body)
+
+        CacheStats.miss("w2-result")
+        response = form_json_response(job.status, status_code=200, addl_resp=job.to_dict())
+        try:
+            async with redis.connect() as redis_conn:
+                await redis_conn.set(
+                    cache_key,
+                    codec.encode(RawJSON(response.content)),
+                    ex=curr_config.W2_RESULT_CACHE_TTL,
+                )
+        except Exception:
+            logger.exception("Unable to cache job details - %s", job)
+        return response
+
     async def get(self, request, job_id):
         """Get details from w2 form, returns job status once till completion
 
+        Responses carry an ETag of the job version, polls with a matching
+        If-None-Match get 304 without the result.
+
         Args:
             request (HttpRequest): Http GET Request
             job_id (str): Processing Job Id
@@ -62,14 +195,25 @@ class W2Intelligence(View):
             if not job_id:
                 return invalid_resp
             try:
-                job = await JobTracker.objects.filter(id=job_id).afirst()
+                job = await JobTracker.objects.filter(id=job_id).select_related(
+                    "source_job"
+                ).afirst()
             except exceptions.ValidationError:
                 return invalid_resp
             if job:
                 logger.info("Successfully fetched job details - %s", job)
-                return form_json_response(
-                    job.status, status_code=200, addl_resp=job.to_dict()
+                # finished jobs do not change, pending ones are revalidated
+                cache_control = (
+                    f"private, max-age={curr_config.W2_RESULT_MAX_AGE}"
+                    if job.is_finished
+                    else "private, no-cache"
                 )
+                if etag_matches(request, job.etag):
+                    logger.info("Job details not modified - %s", job)
+                    response = HttpResponseNotModified()
+                else:
+                    response = await self.job_response(job)
+                return set_cache_headers(response, job.etag, cache_control)
             return invalid_resp
         except Exception:
             logger.exception("Error occurred while fetching job status")
@@ -77,67 +221,387 @@ class W2Intelligence(View):
                 "unexpected error", 500, error_message="Unexpected error occurred."
             )
 
+    @staticmethod
+    async def reuse_result(job_id, file_hash, source_job):
+        """Creates a finished job pointing to the result of the source job."""
+        now = timezone.now()
+        job = JobTracker(
+            id=job_id,
+            status=JobTracker.Status.SUCCESS,
+            file_hash=file_hash,
+            source_job=source_job,
+            started_at=now,
+            finished_at=now,
+        )
+        await job.asave()
+        logger.info("Reusing result of job - %s for job - %s", source_job.id, job_id)
+        CacheStats.hit("w2-dedup")
+        return form_json_response(
+            "success", 201, addl_resp={"job_id": job_id, "reused": True}
+        )
+
+    @staticmethod
+    async def discard_upload(request):
+        """Removes the W-2 file streamed to disk for a request not submitted."""
+        upload = getattr(request, "scope", {}).get(STREAMED_UPLOAD)
+        if upload and upload.path:
+            await cleanup(upload.path)
+
+    @staticmethod
+    async def replay(job_id):
+        """Responds with the current status of the job of an earlier request."""
+        job = await JobTracker.objects.filter(id=job_id).afirst()
+        response = form_json_response(
+            job.status if job else "queued", 200, addl_resp={"job_id": job_id}
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response
+
     async def post(self, request):
         """Gets Input W-2 file as request and pushes it to queue for processing.
 
+        Requests with an `Idempotency-Key` header are processed once, retries
+        with the same key within W2_IDEMPOTENCY_TTL get the original job id
+        & its current status. Retries while the first request is running wait
+        for it to complete.
+
         Args:
             request (HttpRequest): Http POST Request
 
         Returns:
             JsonResponse: Status & queued Job Id.
         """
-        job = None
-        try:
-            logger.info("Processing recieved w2 form request")
-            w2_form = request.FILES["file"]
-            mime_type = w2_form.content_type
-            if mime_type not in curr_config.ALLOWED_FILE_TYPES:
-                logger.info("invald w2 form recieved in the request - %s", mime_type)
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is None:
+            return await self.submit(request)
+        if not 0 < len(idempotency_key) <= curr_config.IDEMPOTENCY_KEY_MAX_LENGTH:
+            await self.discard_upload(request)
+            return form_json_response(
+                "failed",
+                400,
+                error_message=(
+                    "Invalid Idempotency-Key, should have 1 to "
+                    f"{curr_config.IDEMPOTENCY_KEY_MAX_LENGTH} characters."
+                ),
+            )
+
+        # reserved by StreamingUploadApp before the file was read
+        reservation = getattr(request, "scope", {}).get(IDEMPOTENCY_RESERVATION)
+        token, result = reservation or await w2_idempotency.reserve(idempotency_key)
+        if token is None:
+            await self.discard_upload(request)
+            if result is None:
+                logger.info("Request in progress for idempotency key - %s", idempotency_key)
                 return form_json_response(
                     "failed",
-                    400,
-                    error_message="Invalid file format, Allowed Types (.png, .jpeg, .pdf).",
+                    409,
+                    error_message="Request with the same Idempotency-Key is in progress, try again later.",
                 )
+            logger.info("Replaying request for idempotency key - %s", idempotency_key)
+            return await self.replay(result["job_id"])
 
-            job_id = uuid.uuid4().hex
-            unique_file_name = f"{job_id[:6]}_{w2_form.name}"
-            tmp_path = os.path.join(TMP_DIR, unique_file_name)
+        response = await self.submit(request)
+        if response.status_code == 201:
+            job_id = serializer.loads(response.content)["job_id"]
+            await w2_idempotency.complete(idempotency_key, token, {"job_id": job_id})
+        else:
+            await w2_idempotency.release(idempotency_key, token)
+        return response
 
-            logger.info("Saving W2 form - '%s' in path '%s'", unique_file_name, TMP_DIR)
-            # save file in temporary path
-            async with aiofiles.open(tmp_path, "wb+") as destination:
-                for chunk in w2_form.chunks():
-                    await destination.write(chunk)
+    async def submit(self, request):
+        """Saves the W-2 file of the request & queues it for processing.
 
-            job_obj = JobTracker(id=job_id, status=JobTracker.Status.QUEUED)
-            job = await job_obj.asave()
+        Files already processed successfully within W2_DEDUP_WINDOW are not
+        processed again, a new job pointing to the earlier result is returned.
+        Uploads streamed to disk by StreamingUploadApp are used as is, others
+        are copied from the files Django parsed.
+        """
+        job = None
+        try:
+            logger.info("Processing recieved w2 form request")
+            upload = getattr(request, "scope", {}).get(STREAMED_UPLOAD)
+            if upload is not None:
+                if upload.error:
+                    return form_json_response(
+                        "failed", upload.status_code, error_message=upload.error
+                    )
+            else:
+                w2_form = request.FILES["file"]
+                if w2_form.content_type not in curr_config.ALLOWED_FILE_TYPES:
+                    logger.info(
+                        "invald w2 form recieved in the request - %s", w2_form.content_type
+                    )
+                    return form_json_response(
+                        "failed", 400, error_message=INVALID_FILE_TYPE
+                    )
+                # save file in temporary path, hashing it along
+                upload = await save_w2_file(w2_form)
+            job_id, tmp_path = upload.id, upload.path
+            mime_type, file_hash = upload.content_type, upload.sha256
+
+            source_job = await JobTracker.afind_reusable(
+                file_hash, curr_config.W2_DEDUP_WINDOW
+            )
+            if source_job:
+                await cleanup(tmp_path)
+                return await self.reuse_result(job_id, file_hash, source_job)
+
+            job = JobTracker(id=job_id, status=JobTracker.Status.QUEUED, file_hash=file_hash)
+            await job.asave()
             await process_w2_forms.kiq(job_id, tmp_path, mime_type)
             logger.info(
                 "Successfully pushed W2 form to job que, filename - %s | job_id - %s",
-                unique_file_name,
+                os.path.basename(tmp_path),
                 job_id,
             )
             return form_json_response("queued", 201, addl_resp={"job_id": job_id})
         except KeyError:
             logger.warning("W-2 form is missing in the request.")
-            return form_json_response(
-                "failed",
-                400,
-                error_message="W-2 form missing in request, Upload form to proceed.",
-            )
+            return form_json_response("failed", 400, error_message=MISSING_FILE)
         except Exception as exc:
             logger.exception(
                 "Exception occurred while processing the input form request."
             )
             if job:
                 await job.amark(
-                    status=job.Status.Failed, _task_result=form_error_response(str(exc))
+                    status=job.Status.FAILED, _task_result=form_error_response(str(exc))
                 )
             return form_json_response(
                 "unexpected error", 500, error_message="Unexpected error occurred."
             )
 
 
+class W2Batch(View):
+    """
+    Class view for batch W-2 submissions, a parent job tracks the batch and
+    a child job is processed per file.
+    """
+
+    # /api/w2/batch, /api/w2/batch/<batch_id>/?page=<n>&page_size=<n>
+
+    @staticmethod
+    async def save_files(request):
+        """Saves the W-2 files of the request, extracting zip archives.
+
+        Raises:
+            UploadError: Missing files, or any file of invalid type / size,
+                no file is kept then.
+        """
+        max_files = curr_config.W2_BATCH_MAX_FILES
+        max_size = curr_config.W2_MAX_UPLOAD_SIZE
+        uploads = []
+        try:
+            for w2_form in request.FILES.getlist("file"):
+                if is_archive(w2_form):
+                    uploads += await extract_w2_archive(
+                        w2_form, max_files - len(uploads), max_size
+                    )
+                    continue
+                if w2_form.content_type not in curr_config.ALLOWED_FILE_TYPES:
+                    raise UploadError(f"{w2_form.name} - {INVALID_FILE_TYPE}")
+                if w2_form.size > max_size:
+                    raise UploadError(
+                        f"{w2_form.name} - {UploadError.too_large(max_size).message}", 413
+                    )
+                if len(uploads) >= max_files:
+                    raise UploadError(f"Too many W-2 forms, Maximum is {max_files} per batch.")
+                uploads.append(await save_w2_file(w2_form))
+        except Exception:
+            for upload in uploads:
+                await cleanup(upload.path)
+            raise
+        if not uploads:
+            raise UploadError(
+                "W-2 forms missing in request, Upload forms or a zip archive to proceed."
+            )
+        return uploads
+
+    async def post(self, request):
+        """Gets W-2 files / zip archives as request and queues a job per file.
+
+        Files already processed successfully within W2_DEDUP_WINDOW are not
+        processed again, as for single submissions. Jobs of all the files are
+        created in bulk & enqueued in one broker round trip.
+
+        Args:
+            request (HttpRequest): Http POST Request
+
+        Returns:
+            JsonResponse: Status, batch id & count of the files.
+        """
+        batch = None
+        uploads = []
+        calls = []
+        queued = False
+        try:
+            logger.info("Processing recieved w2 batch request")
+            try:
+                uploads = await self.save_files(request)
+            except UploadError as error:
+                logger.info("Invalid w2 batch request - %s", error.message)
+                return form_json_response(
+                    "failed", error.status_code, error_message=error.message
+                )
+
+            reusable = await JobTracker.afind_reusable_many(
+                [upload.sha256 for upload in uploads], curr_config.W2_DEDUP_WINDOW
+            )
+            now = timezone.now()
+            batch = JobTracker(
+                id=uuid.uuid4().hex, status=JobTracker.Status.QUEUED, batch_size=len(uploads)
+            )
+            children = []
+            reused_paths = []
+            for upload in uploads:
+                child = JobTracker(
+                    id=upload.id,
+                    status=JobTracker.Status.QUEUED,
+                    batch=batch,
+                    file_name=upload.name,
+                    file_hash=upload.sha256,
+                )
+                source_job = reusable.get(upload.sha256)
+                if source_job:
+                    child.status = JobTracker.Status.SUCCESS
+                    child.source_job = source_job
+                    child.started_at = child.finished_at = now
+                    reused_paths.append(upload.path)
+                else:
+                    calls.append((upload.id, upload.path, upload.content_type))
+                children.append(child)
+
+            await batch.asave()
+            await JobTracker.objects.abulk_create(children)
+            if calls:
+                await enqueue_w2_batch.kiq(calls)
+            queued = True
+            for filepath in reused_paths:
+                await cleanup(filepath)
+            reused = len(children) - len(calls)
+            if reused:
+                CacheStats.hit("w2-dedup", reused)
+            logger.info(
+                "Successfully pushed W2 batch to job que, batch_id - %s | files - %s | reused - %s",
+                batch.id,
+                len(children),
+                reused,
+            )
+            return form_json_response(
+                "queued",
+                201,
+                addl_resp={
+                    "batch_id": batch.id,
+                    "total": len(children),
+                    "queued": len(calls),
+                    "reused": reused,
+                },
+            )
+        except Exception as exc:
+            logger.exception("Exception occurred while processing the w2 batch request.")
+            if batch:
+                await JobTracker.objects.filter(
+                    Q(id=batch.id) | Q(batch_id=batch.id), status=JobTracker.Status.QUEUED
+                ).aupdate(
+                    status=JobTracker.Status.FAILED,
+                    finished_at=timezone.now(),
+                    _task_result=form_error_response(str(exc)),
+                )
+            return form_json_response(
+                "unexpected error", 500, error_message="Unexpected error occurred."
+            )
+        finally:
+            # files of a batch that was not queued are not processed
+            if not queued:
+                for upload in uploads:
+                    await cleanup(upload.path)
+
+    async def get(self, request, batch_id):
+        """Gets aggregate progress of the batch, with a page of the completed
+        results (in order of completion).
+
+        Args:
+            request (HttpRequest): Http GET Request
+            batch_id (str): Batch Id
+
+        Returns:
+            JsonReponse: Batch status, progress & completed W-2 form details
+        """
+        try:
+            logger.info("Fetching details for batch id - %s", batch_id)
+            invalid_resp = form_json_response(
+                "failed",
+                status_code=400,
+                error_message="Invalid Batch id, Provide a valid Batch Id to get results.",
+            )
+            max_page_size = curr_config.W2_BATCH_MAX_PAGE_SIZE
+            try:
+                page = int(request.GET.get("page", 1))
+                page_size = int(request.GET.get("page_size", curr_config.W2_BATCH_PAGE_SIZE))
+            except ValueError:
+                page = page_size = 0
+            if page < 1 or not 0 < page_size <= max_page_size:
+                return form_json_response(
+                    "failed",
+                    400,
+                    error_message=(
+                        "Invalid page / page_size, page_size should be between "
+                        f"1 and {max_page_size}."
+                    ),
+                )
+            try:
+                batch = await JobTracker.objects.filter(
+                    id=batch_id, batch_size__isnull=False
+                ).afirst()
+            except exceptions.ValidationError:
+                return invalid_resp
+            if not batch:
+                return invalid_resp
+
+            counts = await batch.aprogress()
+            completed = sum(counts[status] for status in JobTracker.FINISHED_STATUSES)
+            offset = (page - 1) * page_size
+            children = batch.children.filter(
+                status__in=JobTracker.FINISHED_STATUSES
+            ).select_related("source_job").order_by("finished_at", "id")[offset:offset + page_size]
+            results = [
+                {"file_name": child.file_name, **child.to_dict()} async for child in children
+            ]
+            response = form_json_response(
+                batch.status,
+                200,
+                addl_resp={
+                    "meta": {
+                        "batch_id": batch.id.hex,
+                        "created_time": batch.created_dtm,
+                        "start_time": batch.started_at,
+                        "end_time": batch.finished_at,
+                    },
+                    "progress": {
+                        "total": batch.batch_size,
+                        "completed": completed,
+                        "percent": round(100 * completed / batch.batch_size, 1),
+                        **{status.lower(): count for status, count in counts.items()},
+                    },
+                    "page": page,
+                    "page_size": page_size,
+                    "total_pages": math.ceil(completed / page_size),
+                    "results": results,
+                },
+            )
+            # pages of finished batches do not change, pending ones are revalidated
+            cache_control = (
+                f"private, max-age={curr_config.W2_RESULT_MAX_AGE}"
+                if batch.is_finished
+                else "private, no-cache"
+            )
+            return conditional_response(request, response, cache_control)
+        except Exception:
+            logger.exception("Error occurred while fetching batch status")
+            return form_json_response(
+                "unexpected error", 500, error_message="Unexpected error occurred."
+            )
+
+
 class Movies(View):
     """
     View for movies Search API
@@ -145,6 +609,20 @@ class Movies(View):
 
     # /api/movies?q=<keyword>&page=<n>
 
+    # content types for streaming search results
+    STREAM_TYPES = ["application/x-ndjson", "text/event-stream"]
+
+    # sources serving search results, auto picks catalog if it covers the page
+    SOURCE_OMDB = "omdb"
+    SOURCE_CATALOG = "catalog"
+    SOURCE_AUTO = "auto"
+    SOURCES = [SOURCE_OMDB, SOURCE_CATALOG, SOURCE_AUTO]
+    # provider statuses served from catalog instead (rate limited, unavailable)
+    UNAVAILABLE_STATUSES = [429, 503]
+    # search pages being fetched in this process, to answer with partial
+    # results once the latency budget runs out
+    in_progress = {}
+
     @staticmethod
     def form_movies_result(movies, directors, total_results: str):
         """Forms dict response based on movies & directors
@@ -178,20 +656,667 @@ class Movies(View):
         response.update({"results": results})
         return response
 
+    @staticmethod
+    def cache_key(search_param, page):
+        """Cache key of a search page, shared by equivalent search terms."""
+        return make_cache_key("movies", search_param, page)
+
+    @staticmethod
+    def popularity_member(search_param, page):
+        """Popularity member of a search page - '<page>|<search term>'."""
+        return f"{page}|{normalize(search_param)}"
+
+    @staticmethod
+    def parse_popularity_member(member):
+        """Returns search term & page of a popularity member."""
+        page, _, search_param = member.partition("|")
+        return search_param, int(page)
+
+    @staticmethod
+    def pages_for(offset, page_size):
+        """OMDB result pages covering page_size results from offset."""
+        per_page = curr_config.OMDB_RESULT_PER_PAGE
+        return list(range(offset // per_page + 1, (offset + page_size - 1) // per_page + 2))
+
+    @staticmethod
+    async def get_cached(cache_key):
+        """Returns cached movies result for the key & whether it is stale.
+
+        Looks up the in-process L1 cache first, then redis. Results are kept
+        in redis for MOVIES_CACHE_TTL + MOVIES_CACHE_STALE_TTL, the result is
+        stale once its remaining TTL is within the stale window.
+
+        Returns:
+            tuple(dict, bool): Cached result (None if not cached), is stale.
+        """
+        cached = movies_l1.get(cache_key)
+        if cached:
+            resp, stale_at = cached
+            return resp, time.time() >= stale_at
+
+        async with redis.connect() as redis_conn:
+            async with redis_conn.pipeline(transaction=False) as pipe:
+                cached_resp, ttl = await pipe.get(cache_key).ttl(cache_key).execute()
+        resp = codec.decode(cached_resp)
+        if resp is None:
+            CacheStats.miss("redis")
+            return None, False
+        CacheStats.hit("redis")
+        fresh_for = ttl - curr_config.MOVIES_CACHE_STALE_TTL
+        movies_l1.set(
+            cache_key, (resp, time.time() + fresh_for), size=len(cached_resp), ttl=ttl
+        )
+        return resp, fresh_for <= 0
+
+    @staticmethod
+    def negative_cache_key(search_param, page):
+        """Cache key of a search page OMDB has no movies for."""
+        return make_cache_key("movies-miss", search_param, page)
+
+    @staticmethod
+    async def get_negative_cached(cache_key):
+        """Returns the cached not found response, None if not cached."""
+        try:
+            async with redis.connect() as redis_conn:
+                response = codec.decode(await redis_conn.get(cache_key))
+        except Exception:
+            logger.exception("Unable to read negative cache - %s", cache_key)
+            return None
+        if response is None:
+            CacheStats.miss("movies-negative")
+        else:
+            CacheStats.hit("movies-negative")
+        return response
+
+    @staticmethod
+    async def set_negative_cached(cache_key, response):
+        try:
+            async with redis.connect() as redis_conn:
+                await redis_conn.set(
+                    cache_key,
+                    codec.encode(response),
+                    ex=curr_config.MOVIES_NEGATIVE_CACHE_TTL,
+                )
+        except Exception:
+            logger.exception("Unable to set negative cache - %s", cache_key)
+
+    @classmethod
+    async def search_page(cls, search_param, page):
+        """Searches movies for a page from OMDB.
+
+        Searches OMDB has no movies for are cached for a short while, so
+        repeated typos & bots do not use the upstream quota. Transient
+        errors (timeouts, 5xx, rate limits) are never cached.
+
+        Args:
+            search_param (str): Search keyword.
+            page (int): Page number.
+        Returns:
+            tuple(int, dict): Status code, provider response.
+        """
+        negative_key = cls.negative_cache_key(search_param, page)
+        response = await cls.get_negative_cached(negative_key)
+        if response is not None:
+            logger.info("Not found response available in cache - '%s'", search_param)
+            return 404, response
+
+        request_data = {"params": {"s": search_param, "page": page}}
+        logger.info("Fetching movies for request - %s", request_data)
+        response, status_code = await OMDBConnector(request_data).process_request()
+        logger.info("Recieved movies details with status code - %s", status_code)
+        if status_code == 200 and not response.get("Search"):
+            # OMDB responds 200 with an error when nothing matches the search
+            logger.info("No movies found in OMDB API - %s", response)
+            await cls.set_negative_cached(negative_key, response)
+            return 404, response
+        if status_code != 200:
+            logger.info("Invalid response recieved from OMDB API - %s", response)
+            return status_code or 400, response
+        return 200, response
+
+    @staticmethod
+    async def set_cached(cache_key, resp):
+        """Sets movies result to redis & L1 cache, drops L1 copies elsewhere."""
+        cache_value = codec.encode(resp)
+        async with redis.connect() as redis_conn:
+            await redis_conn.set(
+                cache_key,
+                cache_value,
+                ex=curr_config.MOVIES_CACHE_TTL + curr_config.MOVIES_CACHE_STALE_TTL,
+            )
+        movies_l1.set(
+            cache_key,
+            (resp, time.time() + curr_config.MOVIES_CACHE_TTL),
+            size=len(cache_value),
+        )
+        await movies_l1.invalidate(cache_key)
+
+    @classmethod
+    async def fetch_page(cls, search_param, page, cache_key):
+        """Fetches movies & directors for a search page from OMDB and caches it.
+
+        Args:
+            search_param (str): Search keyword.
+            page (int): Page number.
+            cache_key (str): Key to cache the result with.
+        Returns:
+            tuple(int, dict): Status code, movies result on success or provider
+                response on failure.
+        """
+        # partial results are read from the latest fetch of the key, an
+        # earlier fetch finishing first leaves it in place
+        progress = {"searched": asyncio.Event(), "directors": {}}
+        cls.in_progress[cache_key] = progress
+        try:
+            status_code, response = await cls.search_page(search_param, page)
+            if status_code != 200:
+                return status_code, response
+
+            # directors are collected as they resolve, for partial results
+            progress["search"] = response
+            progress["searched"].set()
+            movies = response["Search"]
+            m_ids = [movie["imdbID"] for movie in movies]
+            directors = progress["directors"]
+            try:
+                async for _id, director in OMDBConnector({}).iter_directors(m_ids):
+                    directors[_id] = director
+            except Exception:
+                logger.exception("Error while fetching directors for movies - %s", m_ids)
+            resp = cls.form_movies_result(
+                movies=movies,
+                directors=directors,
+                total_results=response["totalResults"],
+            )
+            # set response to redis cache
+            await cls.set_cached(cache_key, resp)
+            await cls.add_to_catalog(movies, directors)
+            return 200, resp
+        finally:
+            progress["searched"].set()
+            if cls.in_progress.get(cache_key) is progress:
+                del cls.in_progress[cache_key]
+
+    @classmethod
+    def partial_page(cls, cache_key):
+        """Forms the result of a page being fetched, from directors resolved so far.
+
+        Movies with directors still being looked up are marked pending.
+
+        Returns:
+            dict: Partial movies result, None if the search is not done yet.
+        """
+        progress = cls.in_progress.get(cache_key)
+        if not progress or "search" not in progress:
+            return None
+        directors = dict(progress["directors"])
+        movies = progress["search"]["Search"]
+        resp = cls.form_movies_result(
+            movies=movies,
+            directors=directors,
+            total_results=progress["search"]["totalResults"],
+        )
+        for movie, result in zip(movies, resp["results"]):
+            if movie["imdbID"] not in directors:
+                result.update({"director": None, "pending": True})
+        resp["pending"] = len(movies) - len(directors)
+        return resp
+
+    @classmethod
+    async def refresh_page(cls, search_param, page, cache_key):
+        """Refreshes a stale search page in cache.
+
+        Stale result is kept for another stale window while the provider
+        circuit is open, so it keeps being served instead of failing.
+        """
+        status_code, resp = await cls.fetch_page(search_param, page, cache_key)
+        if status_code != 200 and not OMDBConnector({}).is_available():
+            logger.info("Provider unavailable, extending stale result - %s", cache_key)
+            async with redis.connect() as redis_conn:
+                await redis_conn.expire(cache_key, curr_config.MOVIES_CACHE_STALE_TTL)
+        return status_code, resp
+
+    @classmethod
+    async def load_page(cls, search_param, page, cache_key, refresh=False):
+        """Fetches or refreshes a search page, then prefetches the next pages.
+
+        Prefetch runs only when the page is loaded from OMDB, cache hits of
+        hot searches make no further redis or upstream calls.
+        """
+        fetch = cls.refresh_page if refresh else cls.fetch_page
+        status_code, resp = await fetch(search_param, page, cache_key)
+        if status_code == 200 and curr_config.MOVIES_PREFETCH_DEPTH:
+            run_in_background(cls.prefetch(search_param, page, resp["total_pages"]))
+        return status_code, resp
+
+    @classmethod
+    async def fetch_pages(cls, search_param, pages):
+        """Fetches multiple search pages concurrently and caches each page.
+
+        Directors of all the pages are resolved in a single batch.
+
+        Args:
+            search_param (str): Search keyword.
+            pages (list): Page numbers.
+        Returns:
+            dict: Page number to tuple(int, dict) of status code & result.
+        """
+        responses = await asyncio.gather(
+            *[cls.search_page(search_param, page) for page in pages]
+        )
+        results = dict(zip(pages, responses))
+        m_ids = [
+            movie["imdbID"]
+            for status_code, response in responses
+            if status_code == 200
+            for movie in response["Search"]
+        ]
+        directors = await OMDBConnector({}).get_directors(movies=m_ids) if m_ids else {}
+        for page, (status_code, response) in results.items():
+            if status_code != 200:
+                continue
+            resp = cls.form_movies_result(
+                movies=response["Search"],
+                directors=directors,
+                total_results=response["totalResults"],
+            )
+            await cls.set_cached(cls.cache_key(search_param, page), resp)
+            await cls.add_to_catalog(response["Search"], directors)
+            results[page] = (200, resp)
+        return results
+
+    @classmethod
+    async def prefetch(cls, search_param, page, total_pages):
+        """Loads the next pages of a search into cache, in background.
+
+        Pages already cached or being loaded are skipped, and prefetch stops
+        when the upstream budget has no room for a full page fetch, so it
+        never delays user requests.
+        """
+        try:
+            page = int(page)
+            last_page = min(page + curr_config.MOVIES_PREFETCH_DEPTH, total_pages)
+            for next_page in range(page + 1, last_page + 1):
+                cache_key = cls.cache_key(search_param, next_page)
+                if movies_flight.is_loading(cache_key):
+                    continue
+                async with redis.connect() as redis_conn:
+                    if await redis_conn.exists(cache_key):
+                        continue
+                # search & director lookups of a page
+                if await omdb_rate_limiter.available() <= curr_config.OMDB_RESULT_PER_PAGE:
+                    logger.info("Upstream budget low, skipping prefetch - '%s'", search_param)
+                    return
+                logger.info("Prefetching page %s for '%s'", next_page, search_param)
+                movies_flight.refresh(
+                    cache_key, partial(cls.fetch_page, search_param, next_page, cache_key)
+                )
+        except Exception:
+            logger.exception("Error while prefetching movies for - '%s'", search_param)
+
+    @classmethod
+    async def warm_page(cls, search_param, page, force=False):
+        """Fetches a search page into the cache, unless already fresh in cache.
+
+        Returns:
+            int: Status code, None if the page was fresh in cache.
+        """
+        cache_key = cls.cache_key(search_param, page)
+        if not force:
+            cached_resp, is_stale = await cls.get_cached(cache_key)
+            if cached_resp and not is_stale:
+                return None
+
+        async def cached():
+            cached_resp, is_stale = await cls.get_cached(cache_key)
+            return (200, cached_resp) if cached_resp and not is_stale else None
+
+        status_code, _ = await movies_flight.do(
+            cache_key,
+            loader=lambda: cls.fetch_page(search_param, page, cache_key),
+            cached=cached,
+        )
+        return status_code
+
+    async def get_page(self, search_param, page, deadline=None):
+        """Returns movies result of a search page, from cache when available.
+
+        Args:
+            search_param (str): Search keyword.
+            page (int): Page number.
+            deadline (float): Loop time to answer by, with the directors
+                resolved so far. The fetch continues in background and caches
+                the full result. None to wait for the full result.
+        Returns:
+            tuple(int, dict): Status code, movies result on success or provider
+                response on failure.
+        """
+        cache_key = self.cache_key(search_param, page)
+
+        cached_resp, is_stale = await self.get_cached(cache_key)
+        if cached_resp:
+            logger.info("Response available in cache, returning cached response.")
+            if is_stale:
+                # serve stale result, refresh it off the request path
+                movies_flight.refresh(
+                    cache_key,
+                    partial(self.load_page, search_param, page, cache_key, refresh=True),
+                )
+            return 200, cached_resp
+
+        def loader():
+            return self.load_page(search_param, page, cache_key)
+
+        async def cached():
+            cached_resp, _ = await self.get_cached(cache_key)
+            return (200, cached_resp) if cached_resp else None
+
+        # only one upstream fetch per key, concurrent misses share the result
+        load = asyncio.ensure_future(
+            movies_flight.do(cache_key, loader=loader, cached=cached)
+        )
+        if deadline is None:
+            return await load
+        loop = asyncio.get_running_loop()
+        try:
+            done, _ = await asyncio.wait([load], timeout=max(deadline - loop.time(), 0))
+            if done:
+                return load.result()
+            progress = self.in_progress.get(cache_key)
+            if progress:
+                # answer once the search is done, without waiting for directors
+                searched = asyncio.ensure_future(progress["searched"].wait())
+                await asyncio.wait([load, searched], return_when=asyncio.FIRST_COMPLETED)
+                searched.cancel()
+                if not load.done() and (resp := self.partial_page(cache_key)):
+                    logger.info(
+                        "Latency budget exceeded for '%s', %s directors pending",
+                        search_param,
+                        resp["pending"],
+                    )
+                    return 200, resp
+            return await load
+        finally:
+            # the shared fetch is shielded, it completes & caches in background
+            load.cancel()
+
+    async def get_range(self, search_param, offset, page_size):
+        """Returns page_size movies from offset, spanning OMDB result pages.
+
+        Cached pages are reused, the missing pages are fetched concurrently.
+        Pages past the last result end the range, other failed pages fail it.
+
+        Returns:
+            tuple(int, dict): Status code, movies result on success or provider
+                response on failure.
+        """
+        per_page = curr_config.OMDB_RESULT_PER_PAGE
+        pages = self.pages_for(offset, page_size)
+        cached_pages = await asyncio.gather(
+            *[self.get_cached(self.cache_key(search_param, page)) for page in pages]
+        )
+        results = {}
+        for page, (cached_resp, is_stale) in zip(pages, cached_pages):
+            if not cached_resp:
+                continue
+            results[page] = (200, cached_resp)
+            if is_stale:
+                cache_key = self.cache_key(search_param, page)
+                movies_flight.refresh(
+                    cache_key, partial(self.refresh_page, search_param, page, cache_key)
+                )
+
+        missing = [page for page in pages if page not in results]
+        if missing:
+            logger.info("Fetching movie pages - %s for '%s'", missing, search_param)
+
+            async def cached():
+                cached_pages = await asyncio.gather(
+                    *[self.get_cached(self.cache_key(search_param, page)) for page in missing]
+                )
+                if all(cached_resp for cached_resp, _ in cached_pages):
+                    return {
+                        page: (200, cached_resp)
+                        for page, (cached_resp, _) in zip(missing, cached_pages)
+                    }
+                return None
+
+            fetched = await movies_flight.do(
+                make_cache_key("movies-pages", search_param, *missing),
+                loader=lambda: self.fetch_pages(search_param, missing),
+                cached=cached,
+            )
+            results.update(fetched)
+
+        status_code, first_resp = results[pages[0]]
+        if status_code != 200:
+            return status_code, first_resp
+
+        movies = []
+        for page in pages:
+            status_code, resp = results[page]
+            if status_code == 404:
+                # pages past the last result
+                break
+            if status_code != 200:
+                # a short page would be cached as complete, the error is returned
+                logger.info("Movie page %s failed for '%s' - %s", page, search_param, status_code)
+                return status_code, resp
+            movies.extend(resp["results"])
+        start = offset % per_page
+        total_results = first_resp["total_results"]
+        return 200, {
+            "total_results": total_results,
+            "total_pages": math.ceil(total_results / page_size),
+            "offset": offset,
+            "page_size": page_size,
+            "results": movies[start:start + page_size],
+        }
+
+    @staticmethod
+    def movies_response(request, status_code, resp, source):
+        """Forms movies search JsonResponse, with the source of the results.
+
+        Results are cacheable by clients & CDNs for the cache TTL, and
+        revalidated with their ETag after. Partial results & errors are not
+        cached. Titles served are recorded for search suggestions.
+        """
+        if status_code != 200:
+            response = form_json_response(
+                "failed",
+                status_code,
+                addl_resp=resp,
+                error_message="Error response from provider, try again later.",
+            )
+            response["Cache-Control"] = "no-store"
+            return response
+        run_in_background(
+            title_index.record([movie["title"] for movie in resp["results"]])
+        )
+        if resp.get("pending"):
+            cache_control = "no-cache"
+        else:
+            cache_control = (
+                f"public, max-age={curr_config.MOVIES_CACHE_TTL}, "
+                f"stale-while-revalidate={curr_config.MOVIES_CACHE_STALE_TTL}"
+            )
+        response = conditional_response(
+            request,
+            form_json_response("success", 200, addl_resp={**resp, "source": source}),
+            cache_control,
+        )
+        # results are streamed instead for stream content types
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    @staticmethod
+    async def add_to_catalog(movies, directors):
+        """Adds movies from OMDB responses to the local catalog."""
+        try:
+            await Movie.aupsert(movies, directors)
+        except Exception:
+            logger.exception("Unable to add movies to catalog")
+
+    @staticmethod
+    async def get_catalog(search_param, offset, page_size):
+        """Searches movies in the local catalog.
+
+        Returns:
+            tuple(int, dict): Status code, movies result on success.
+        """
+        movies, total = await Movie.asearch(search_param, offset=offset, limit=page_size)
+        if not movies:
+            return 404, {"Response": "False", "Error": "Movie not found in catalog!"}
+        return 200, {
+            "total_results": total,
+            "total_pages": math.ceil(total / page_size),
+            "results": [
+                {"title": movie.title, "director": movie.director or "N/A"}
+                for movie in movies
+            ],
+        }
+
+    async def is_cached(self, search_param, offset, page_size):
+        """Returns True if all the search pages of the range are in cache."""
+        cached_pages = await asyncio.gather(
+            *[
+                self.get_cached(self.cache_key(search_param, page))
+                for page in self.pages_for(offset, page_size)
+            ]
+        )
+        return all(cached_resp for cached_resp, _ in cached_pages)
+
+    @staticmethod
+    def has_coverage(status_code, resp):
+        """Returns True if the catalog result is good enough to skip OMDB.
+
+        Catalog should have enough matches for the search, with directors
+        known for all the movies in the result.
+        """
+        return (
+            status_code == 200
+            and resp["total_results"] >= curr_config.MOVIES_CATALOG_MIN_MATCHES
+            and all(movie["director"] != "N/A" for movie in resp["results"])
+        )
+
+    @classmethod
+    def stream_type(cls, request):
+        """Returns the streaming content type requested, None otherwise."""
+        accept = request.headers.get("Accept", "")
+        return next((_type for _type in cls.STREAM_TYPES if _type in accept), None)
+
+    @staticmethod
+    def format_event(content_type, event, data):
+        """Formats a stream event as NDJSON line or SSE message."""
+        if content_type == "text/event-stream":
+            return f"event: {event}\ndata: {serializer.dumps(data).decode()}\n\n"
+        return serializer.dumps({"event": event, **data}).decode() + "\n"
+
+    async def stream_page(self, search_param, page, content_type):
+        """Streams movies of a search page, a line per movie as directors resolve.
+
+        Events:
+            search: total results, pages & titles, as soon as OMDB search returns.
+            movie: index, title & director of a movie.
+            error: provider error response.
+            done: end of the stream.
+        """
+        try:
+            cache_key = self.cache_key(search_param, page)
+            cached_resp, is_stale = await self.get_cached(cache_key)
+            if cached_resp:
+                logger.info("Response available in cache, streaming cached response.")
+                if is_stale:
+                    movies_flight.refresh(
+                        cache_key, partial(self.refresh_page, search_param, page, cache_key)
+                    )
+                results = cached_resp["results"]
+                yield self.format_event(content_type, "search", {
+                    "total_results": cached_resp["total_results"],
+                    "total_pages": cached_resp["total_pages"],
+                    "titles": [movie["title"] for movie in results],
+                })
+                for index, movie in enumerate(results):
+                    yield self.format_event(content_type, "movie", {"index": index, **movie})
+                yield self.format_event(content_type, "done", {})
+                return
+
+            status_code, response = await self.search_page(search_param, page)
+            if status_code != 200:
+                error = form_error_response(
+                    "Error response from provider, try again later.", json_type=False
+                )
+                error["error"].update(response)
+                yield self.format_event(
+                    content_type, "error", {"status_code": status_code, **error}
+                )
+                return
+
+            movies = response["Search"]
+            meta = self.form_movies_result(
+                movies=[], directors={}, total_results=response["totalResults"]
+            )
+            yield self.format_event(content_type, "search", {
+                "total_results": meta["total_results"],
+                "total_pages": meta["total_pages"],
+                "titles": [movie["Title"] for movie in movies],
+            })
+
+            positions = {}
+            for index, movie in enumerate(movies):
+                positions.setdefault(movie["imdbID"], []).append(index)
+            directors = {}
+            connector = OMDBConnector({})
+            async for _id, director in connector.iter_directors(list(positions)):
+                directors[_id] = director
+                for index in positions[_id]:
+                    yield self.format_event(content_type, "movie", {
+                        "index": index,
+                        "title": movies[index]["Title"],
+                        "director": director,
+                    })
+
+            resp = self.form_movies_result(
+                movies=movies,
+                directors=directors,
+                total_results=response["totalResults"],
+            )
+            await self.set_cached(cache_key, resp)
+            await self.add_to_catalog(movies, directors)
+            yield self.format_event(content_type, "done", {})
+        except Exception:
+            logger.exception("Exception occurred while streaming movies")
+            error = form_error_response("Unexpected error occurred.", json_type=False)
+            yield self.format_event(
+                content_type, "error", {"status_code": 500, **error}
+            )
+
     async def get(self, request):
         """Search movies API
 
+        Supports `page_size` & `offset` query params for result pages of any
+        size, instead of the fixed OMDB page. Page results are streamed when
+        requested with `Accept: application/x-ndjson` or `text/event-stream`.
+
+        Pages are answered within `max_latency_ms`, movies with directors not
+        resolved by then are marked pending and cached once resolved.
+
+        Results carry an ETag, requests with a matching If-None-Match get 304.
+
         Args:
             request (HttpRequest): Http GET Request with query params
 
         Returns:
             JsonResponse:
         """
+        started = asyncio.get_running_loop().time()
         try:
             query_params = request.GET
             logger.info("Searching movies for query search param - %s", query_params)
-            search_param = query_params.get("q")
+            search_param = " ".join(query_params.get("q", "").split())
             page = query_params.get("page", 1)
+            page_size = query_params.get("page_size")
+            offset = query_params.get("offset")
 
             if not search_param:
                 logger.info("No search params given, returning empty result - '%s'", search_param)
@@ -200,44 +1325,142 @@ class Movies(View):
                 )
                 return form_json_response("success", 200, addl_resp=resp)
 
-            async with redis.connect() as redis_conn:
-                cache_key = f"{search_param}_{page}"
-                cached_resp = await redis_conn.get(cache_key)
-                if cached_resp:
-                    logger.info("Response available in cache, returning cached response.")
-                    return form_json_response(
-                        "success", 200, addl_resp=json.loads(cached_resp)
-                    )
+            ranged = bool(page_size or offset)
+            try:
+                page_size = int(page_size or curr_config.OMDB_RESULT_PER_PAGE)
+                offset = int(offset) if offset else (int(page) - 1) * page_size
+            except ValueError:
+                page_size = offset = -1
+            if not 0 < page_size <= curr_config.MOVIES_MAX_PAGE_SIZE or offset < 0:
+                logger.info("Invalid page size / offset - %s, %s", page_size, offset)
+                return form_json_response(
+                    "failed",
+                    400,
+                    error_message=(
+                        "Invalid page / page_size / offset, page_size should be between "
+                        f"1 and {curr_config.MOVIES_MAX_PAGE_SIZE}."
+                    ),
+                )
 
-            request_data = {"params": {"s": search_param, "page": page}}
-            logger.info("Fetching movies for request - %s", request_data)
-            response, status_code = await OMDBConnector(request_data).process_request()
-            logger.info("Recieved movies details with status code - %s", status_code)
-            movies = response.get("Search")
-            if status_code != 200 or not movies:
-                logger.info("Invalid response recieved from OMDB API - %s", response)
+            try:
+                max_latency_ms = int(
+                    query_params.get("max_latency_ms", curr_config.MOVIES_MAX_LATENCY_MS)
+                )
+            except ValueError:
+                max_latency_ms = -1
+            if not 0 <= max_latency_ms <= curr_config.MOVIES_MAX_LATENCY_LIMIT_MS:
                 return form_json_response(
                     "failed",
-                    status_code or 400,
-                    addl_resp=response,
-                    error_message="Error response from provider, try again later.",
+                    400,
+                    error_message=(
+                        "Invalid max_latency_ms, max_latency_ms should be between "
+                        f"0 and {curr_config.MOVIES_MAX_LATENCY_LIMIT_MS}."
+                    ),
                 )
+            deadline = (
+                started + max_latency_ms / 1000 if max_latency_ms else None
+            )
 
-            m_ids = [movie["imdbID"] for movie in movies]
-            directors = await OMDBConnector({}).get_directors(movies=m_ids)
-            resp = self.form_movies_result(
-                movies=movies,
-                directors=directors,
-                total_results=response["totalResults"],
+            source = query_params.get("source", curr_config.MOVIES_SEARCH_SOURCE)
+            if source not in self.SOURCES:
+                return form_json_response(
+                    "failed",
+                    400,
+                    error_message=f"Invalid source, Allowed ({', '.join(self.SOURCES)}).",
+                )
+            # ranks searched pages for cache warming
+            run_in_background(
+                movies_popularity.record(
+                    self.popularity_member(search_param, page)
+                    for page in self.pages_for(offset, page_size)
+                )
             )
-            # set response to redis cache
-            async with redis.connect() as redis_conn:
-                await redis_conn.set(
-                    cache_key, json.dumps(resp), ex=curr_config.MOVIES_CACHE_TTL
+
+            # auto asks the catalog only for searches not in cache
+            if source == self.SOURCE_CATALOG or (
+                source == self.SOURCE_AUTO
+                and not await self.is_cached(search_param, offset, page_size)
+            ):
+                status_code, resp = await self.get_catalog(search_param, offset, page_size)
+                if source == self.SOURCE_CATALOG or self.has_coverage(status_code, resp):
+                    logger.info("Serving movies for - '%s' from local catalog", search_param)
+                    return self.movies_response(
+                        request, status_code, resp, self.SOURCE_CATALOG
+                    )
+
+            if ranged:
+                status_code, resp = await self.get_range(search_param, offset, page_size)
+            elif content_type := self.stream_type(request):
+                logger.info("Streaming movies for - '%s' as %s", search_param, content_type)
+                response = StreamingHttpResponse(
+                    self.stream_page(search_param, page, content_type),
+                    content_type=content_type,
                 )
-            return form_json_response("success", 200, addl_resp=resp)
+                response["Cache-Control"] = "no-cache"
+                response["X-Accel-Buffering"] = "no"
+                return response
+            else:
+                status_code, resp = await self.get_page(search_param, page, deadline=deadline)
+
+            if status_code in self.UNAVAILABLE_STATUSES:
+                # provider rate limited / down, answer from local catalog
+                catalog_status, catalog_resp = await self.get_catalog(
+                    search_param, offset, page_size
+                )
+                if catalog_status == 200:
+                    logger.info("Provider unavailable, serving '%s' from catalog", search_param)
+                    return self.movies_response(
+                        request, 200, catalog_resp, self.SOURCE_CATALOG
+                    )
+            return self.movies_response(request, status_code, resp, self.SOURCE_OMDB)
         except Exception:
             logger.exception("Exception occurred while fetching movies")
             return form_json_response(
                 "unexpected error", 500, error_message="Unexpected error occurred."
             )
+
+
+async def cache_metrics(request):
+    """Cache hit / miss counters of this worker process."""
+    return form_json_response("success", 200, addl_resp={"metrics": CacheStats.snapshot()})
+
+
+class MovieSuggest(View):
+    """
+    View for movie title suggestions, served from in-process title index
+    """
+
+    # /api/movies/suggest?prefix=<text>&limit=<n>
+
+    async def get(self, request):
+        """Suggest movie titles API
+
+        Args:
+            request (HttpRequest): Http GET Request with query params
+
+        Returns:
+            JsonResponse: Most popular titles matching the prefix.
+        """
+        try:
+            prefix = request.GET.get("prefix", "")
+            try:
+                limit = int(request.GET.get("limit", 10))
+            except ValueError:
+                limit = 0
+            if not 0 < limit <= curr_config.SUGGEST_MAX_LIMIT:
+                return form_json_response(
+                    "failed",
+                    400,
+                    error_message=(
+                        f"Invalid limit, limit should be between 1 and {curr_config.SUGGEST_MAX_LIMIT}."
+                    ),
+                )
+            suggestions = title_index.suggest(prefix, limit=limit)
+            return form_json_response(
+                "success", 200, addl_resp={"prefix": prefix, "suggestions": suggestions}
+            )
+        except Exception:
+            logger.exception("Exception occurred while suggesting movies")
+            return form_json_response(
+                "unexpected error", 500, error_message="Unexpected error occurred."
+            )
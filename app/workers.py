@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 import asyncio
 import django
@@ -8,14 +7,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task.settings")
 django.setup()
 
 from django.utils import timezone
-from taskiq import TaskiqMiddleware, TaskiqMessage
+from taskiq import TaskiqEvents, TaskiqMiddleware, TaskiqMessage, TaskiqState
 from taskiq_redis import ListQueueBroker
 from asgiref.sync import sync_to_async
 
 from .config import curr_config
+from . import serializer
 from .models import JobTracker
 from .prompts import W2_FORM_PROMPT
-from .connector import GeminiConnector
+from .connector import GeminiClient, GeminiConnector
 from task.settings import BROKER_BACKEND_URL
 
 logger = logging.getLogger(__name__)
@@ -23,12 +23,12 @@ logger = logging.getLogger(__name__)
 
 def form_error_response(message, json_type: bool = True):
     try:
-        message = json.loads(message)
-    except (TypeError, json.decoder.JSONDecodeError):
+        message = serializer.loads(message)
+    except (TypeError, ValueError):
         pass
     if not isinstance(message, dict):
         message = {"error": {"message": str(message)}}
-    return message if not json_type else json.dumps(message)
+    return message if not json_type else serializer.dumps(message).decode()
 
 
 class TimeoutMiddleware(TaskiqMiddleware):
@@ -60,6 +60,17 @@ broker = ListQueueBroker(BROKER_BACKEND_URL)
 broker.add_middlewares(TimeoutMiddleware(timeout=curr_config.WORKER_TIMEOUT))
 
 
+@broker.on_event(TaskiqEvents.WORKER_STARTUP)
+async def worker_startup(state: TaskiqState):
+    """Opens the Gemini client shared by the tasks of the worker process."""
+    GeminiClient.get()
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def worker_shutdown(state: TaskiqState):
+    await GeminiClient.close()
+
+
 @sync_to_async
 def cleanup(filepath: str):
     try:
@@ -101,3 +112,33 @@ async def process_w2_forms(job_id: str, filepath: str, mime_type: str):
         await job.amark(
             status=job.Status.FAILED, _task_result=form_error_response(str(exc))
         )
+
+
+@broker.task
+async def enqueue_w2_batch(calls: list):
+    """Enqueues a job per file of a W-2 batch.
+
+    The view sends all the calls of a batch in one message, a single broker
+    round trip that is enqueued entirely or not at all. The jobs are kicked
+    from here, jobs failing to be enqueued are marked failed & their files
+    removed, the rest are processed as usual.
+
+    Args:
+        calls (list): Arguments (job id, file path, mime type) of every job.
+    """
+    results = await asyncio.gather(
+        *[process_w2_forms.kiq(*args) for args in calls], return_exceptions=True
+    )
+    failed = 0
+    for (job_id, filepath, _), result in zip(calls, results):
+        if not isinstance(result, Exception):
+            continue
+        failed += 1
+        logger.error("Unable to enqueue w2 job - %s, %s", job_id, result)
+        await JobTracker.objects.filter(id=job_id, status=JobTracker.Status.QUEUED).aupdate(
+            status=JobTracker.Status.FAILED,
+            finished_at=timezone.now(),
+            _task_result=form_error_response(str(result)),
+        )
+        await cleanup(filepath)
+    logger.info("Enqueued %s jobs of w2 batch, failed - %s", len(calls) - failed, failed)
@@ -8,9 +8,52 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import logging
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.urls import reverse  # noqa: E402
+
+from app.cache import LRUCache  # noqa: E402
+from app.connector import open_connections, close_connections  # noqa: E402
+from app.suggest import title_index  # noqa: E402
+from app.uploads import StreamingUploadApp  # noqa: E402
+from app.views import w2_idempotency  # noqa: E402
+
+# W-2 uploads are written to disk as they arrive, not buffered by Django,
+# replays of an Idempotency-Key are answered without writing them
+django_application = StreamingUploadApp(
+    django_application, path=reverse("w2_process"), idempotency=w2_idempotency
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def lifespan(scope, receive, send):
+    """Handles ASGI lifespan events, Django only serves http connections."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await open_connections()
+                title_index.ensure_loaded()
+            except Exception as exc:
+                logger.exception("Error while opening shared connections")
+                await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await LRUCache.close_all()
+            await close_connections()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    return await django_application(scope, receive, send)
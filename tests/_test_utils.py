@@ -16,6 +16,15 @@ def mock_args_async(return_val=None, _is_exp=False):
     return mock
 
 
+def mock_iter_async(items):
+    """Mocks async generators, yielding the (key, value) pairs of items."""
+    async def mock(*args, **kwargs):
+        for item in items.items():
+            yield item
+
+    return mock
+
+
 def mock_execute(executable_func, _is_sync=False):
 
     async def mock_exec(*args, **kwargs):
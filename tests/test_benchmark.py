@@ -0,0 +1,37 @@
+from conftest import TestBase
+
+from app.benchmark import compare
+from app.fake_omdb import FakeOMDB, Latency
+
+
+class TestBenchmark(TestBase):
+    """Testcases related to fake OMDB & movies load test"""
+
+    def test_fake_omdb_responses(self):
+        """Testing fake OMDB answers searches & lookups in OMDB format"""
+        fake_omdb = FakeOMDB(catalog_size=500)
+        query = fake_omdb.sample_queries(1)[0]
+        response = fake_omdb.search(query, 1)
+        self.assertEqual(response["Response"], "True")
+        self.assertLessEqual(len(response["Search"]), 10)
+        self.assertGreaterEqual(int(response["totalResults"]), len(response["Search"]))
+        movie = fake_omdb.lookup(response["Search"][0]["imdbID"])
+        self.assertIn("Director", movie)
+        self.assertEqual(fake_omdb.search("no such movie", 1)["Response"], "False")
+
+        self.assertEqual(Latency("fixed:20").sample(), 0.02)
+        self.assertTrue(0.01 <= Latency("uniform:10,30").sample() <= 0.03)
+        with self.assertRaises(ValueError):
+            Latency("normal:10")
+
+    def test_compare_with_baseline(self):
+        """Testing regressions are reported beyond the tolerance"""
+        baseline = {"p95_ms": 100, "throughput": 50, "cache_hit_ratio": 0.8}
+        self.assertEqual(
+            compare({"p95_ms": 110, "throughput": 45, "cache_hit_ratio": 0.7}, baseline), []
+        )
+        regressions = compare(
+            {"p95_ms": 130, "throughput": 30, "cache_hit_ratio": 0.8}, baseline
+        )
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("p95_ms"))
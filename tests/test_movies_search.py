@@ -1,3 +1,5 @@
+import json
+import time
 import pytest
 import copy
 import asyncio
@@ -6,14 +8,21 @@ from unittest.mock import patch
 from django.urls import reverse
 
 from conftest import TestBase
-from _test_utils import mock_args_async
+from _test_utils import mock_args_async, mock_iter_async
 from _test_constants import (
     sample_movie_search_response,
     sample_movie_search_error_response,
     sample_movie_director_fetch_response,
 )
 
-from app.connector import BaseRedis
+from app.config import curr_config
+from app.cache import CacheStats
+from app.connector import BaseRedis, CircuitBreaker, OMDBConnector, RateLimiter
+from app.codec import codec
+from app.models import Movie
+from app.suggest import TitleIndex, title_index
+from app.views import Movies, background_tasks, movies_l1, movies_popularity
+from app.management.commands.warm_movies_cache import Command as WarmMoviesCache
 
 
 @pytest.mark.asyncio
@@ -25,7 +34,12 @@ class TestMoviesSearch(TestBase):
         self.url = reverse("movies")
         self.cached_keys = []
         self.redis = BaseRedis()
-        
+        movies_l1.clear()
+        # background prefetch disabled, enabled in prefetch tests
+        prefetch_patcher = patch.object(curr_config, "MOVIES_PREFETCH_DEPTH", 0)
+        prefetch_patcher.start()
+        self.addCleanup(prefetch_patcher.stop)
+
     def tearDown(self):
         super().tearDown()
 
@@ -51,6 +65,14 @@ class TestMoviesSearch(TestBase):
         self.assertEqual(response["total_results"], 0)
         self.assertEqual(response["total_pages"], 0)
 
+    def test_movies_cache_key_normalized(self):
+        """Testing equivalent search terms share the cache key"""
+        cache_key = Movies.cache_key("Batman", 1)
+        self.assertEqual(Movies.cache_key(" batman ", "1"), cache_key)
+        self.assertEqual(Movies.cache_key("BATMAN", 1), cache_key)
+        self.assertNotEqual(Movies.cache_key("Batman", 2), cache_key)
+        self.assertTrue(cache_key.startswith("movies:"))
+
     @patch("app.views.OMDBConnector.process_request")
     async def test_no_movies_from_search(self, mock_process_request):
         """Testing Movies Search API validations"""
@@ -88,8 +110,8 @@ class TestMoviesSearch(TestBase):
         self.assertEqual(response["error"]["message"], "Unexpected error occurred.")
 
     @patch("app.views.OMDBConnector.process_request")
-    @patch("app.views.OMDBConnector.get_directors")
-    async def test_movies_pagination(self, mock_get_directors, mock_process_request):
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_pagination(self, mock_iter_directors, mock_process_request):
         """Testing Movies Search API pagination check"""
         # mocks
         page = 0
@@ -99,9 +121,7 @@ class TestMoviesSearch(TestBase):
         )
         directors = copy.deepcopy(sample_movie_director_fetch_response)
         dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
-        mock_get_directors.side_effect = mock_args_async(
-            return_val=dir_response,
-        )
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
         
         page += 1  # list index 0 resp mapped to page 1
         params = {
@@ -118,14 +138,12 @@ class TestMoviesSearch(TestBase):
         self.assertEqual(len(response['results']), 10)
         first_results = response['results']
         
-        self.cached_keys.append(f"{params["q"]}_{page}")
+        self.cached_keys.append(Movies.cache_key(params["q"], page))
          
         mock_process_request.side_effect = mock_args_async(
             return_val=(movies[page], 200),
         )
-        mock_get_directors.side_effect = mock_args_async(
-            return_val=dir_response,
-        )
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
         page += 1 # list index 1 resp mapped to page 2
         params.update({"page": page})
 
@@ -140,12 +158,12 @@ class TestMoviesSearch(TestBase):
         self.assertNotEqual(response['results'], first_results)
         
         # cleanup
-        self.cached_keys.append(f"{params["q"]}_{page}")
+        self.cached_keys.append(Movies.cache_key(params["q"], page))
         await self.cleanup_redis()
         
     @patch("app.views.OMDBConnector.process_request")
-    @patch("app.views.OMDBConnector.get_directors")
-    async def test_movies_success_verify_cache(self, mock_get_directors, mock_process_request):
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_success_verify_cache(self, mock_iter_directors, mock_process_request):
         """Testing Movies Search API cache result verify"""
         # mocks
         page = 0
@@ -155,9 +173,7 @@ class TestMoviesSearch(TestBase):
         )
         directors = copy.deepcopy(sample_movie_director_fetch_response)
         dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
-        mock_get_directors.side_effect = mock_args_async(
-            return_val=dir_response,
-        )
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
         
         page += 1
         params = {
@@ -176,7 +192,7 @@ class TestMoviesSearch(TestBase):
         # verify in redis cache
         
         async with self.redis.connect() as redis_conn:
-            self.assertIsNotNone(await redis_conn.get(f"{params["q"]}_{page}"))
+            self.assertIsNotNone(await redis_conn.get(Movies.cache_key(params["q"], page)))
         
         response = await self.client.get(self.url, query_params=params)
         self.assertEqual(response.status_code, 200)
@@ -189,9 +205,334 @@ class TestMoviesSearch(TestBase):
         self.assertEqual(response['results'], first_results)
 
         # cleanup
-        self.cached_keys.append(f"{params["q"]}_{page}")
+        self.cached_keys.append(Movies.cache_key(params["q"], page))
         await self.cleanup_redis()
     
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_conditional_get(self, mock_iter_directors, mock_process_request):
+        """Testing Movies Search API ETag & 304 for unchanged results"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing ETag"
+        }
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn(f"max-age={curr_config.MOVIES_CACHE_TTL}", response["Cache-Control"])
+        self.assertIn("Accept", response["Vary"])
+
+        # unchanged result, not sent again
+        response = await self.client.get(
+            self.url, query_params=params, headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = await self.client.get(
+            self.url, query_params=params, headers={"If-None-Match": '"outdated"'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], etag)
+
+        # cleanup
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        await self.cleanup_redis()
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_concurrent_misses_coalesced(self, mock_iter_directors, mock_process_request):
+        """Testing concurrent Movies Search misses fetch upstream only once"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+
+        async def process_request(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            return copy.deepcopy(movies[0]), 200
+
+        mock_process_request.side_effect = process_request
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing Coalesce"
+        }
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        await self.cleanup_redis()
+        responses = await asyncio.gather(
+            *[self.client.get(self.url, query_params=params) for _ in range(5)]
+        )
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()["results"]), 10)
+        self.assertEqual(mock_process_request.call_count, 1)
+        self.assertEqual(mock_iter_directors.call_count, 1)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_stale_cache_refreshed(self, mock_iter_directors, mock_process_request):
+        """Testing stale Movies Search result is served & refreshed in background"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing Stale"
+        }
+        cache_key = Movies.cache_key(params["q"], 1)
+        self.cached_keys.append(cache_key)
+        stale_resp = {"total_results": 1, "total_pages": 1, "results": [{"title": "Stale", "director": "N/A"}]}
+        async with self.redis.connect() as redis_conn:
+            await redis_conn.set(
+                cache_key, codec.encode(stale_resp), ex=curr_config.MOVIES_CACHE_STALE_TTL - 1
+            )
+
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], stale_resp["results"])
+
+        # wait for background refresh
+        await asyncio.sleep(0.5)
+        self.assertEqual(mock_process_request.call_count, 1)
+        async with self.redis.connect() as redis_conn:
+            self.assertGreater(await redis_conn.ttl(cache_key), curr_config.MOVIES_CACHE_STALE_TTL)
+
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 10)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_l1_cache(self, mock_iter_directors, mock_process_request):
+        """Testing Movies Search result is served from in-process cache"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing L1"
+        }
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        first_results = response.json()["results"]
+
+        # remove from redis, result still served from process memory
+        await self.cleanup_redis()
+        l1_hits = CacheStats.snapshot().get("movies.hits", 0)
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], first_results)
+        self.assertEqual(mock_process_request.call_count, 1)
+        self.assertEqual(CacheStats.snapshot()["movies.hits"], l1_hits + 1)
+
+    @patch("app.views.Movies.search_page")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_page_size(self, mock_iter_directors, mock_search_page):
+        """Testing Movies Search API with page size & offset across OMDB pages"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+
+        async def search_page(search_param, page):
+            return 200, copy.deepcopy(movies[int(page) - 1])
+
+        mock_search_page.side_effect = search_page
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing Page Size",
+            "page_size": 15,
+            "offset": 5,
+        }
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        response = response.json()
+        self.assertEqual(response["status"], "success")
+        self.assertEqual(response["total_results"], 20)
+        self.assertEqual(response["total_pages"], 2)
+        self.assertEqual(response["offset"], 5)
+        self.assertEqual(len(response["results"]), 15)
+        self.assertEqual(response["results"][0]["title"], movies[0]["Search"][5]["Title"])
+        self.assertEqual(response["results"][-1]["title"], movies[1]["Search"][-1]["Title"])
+        # both pages fetched, directors resolved in one batch
+        self.assertEqual(mock_search_page.call_count, 2)
+        self.assertEqual(mock_iter_directors.call_count, 1)
+
+        # each OMDB page cached on its own
+        async with self.redis.connect() as redis_conn:
+            for page in [1, 2]:
+                self.assertIsNotNone(await redis_conn.get(Movies.cache_key(params["q"], page)))
+
+        # cleanup
+        self.cached_keys.extend(Movies.cache_key(params["q"], page) for page in [1, 2])
+        await self.cleanup_redis()
+
+    @patch("app.views.Movie.asearch")
+    @patch("app.views.Movies.search_page")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_page_size_page_error(self, mock_iter_directors, mock_search_page, mock_asearch):
+        """Testing Movies Search API fails a range with a failed page instead of shortening it"""
+        # mocks, second page rate limited
+        movies = copy.deepcopy(sample_movie_search_response)
+
+        async def search_page(search_param, page):
+            if int(page) == 2:
+                return 429, {"Response": "False", "Error": "Too many requests"}
+            return 200, copy.deepcopy(movies[0])
+
+        mock_search_page.side_effect = search_page
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+        mock_asearch.side_effect = mock_args_async(return_val=([], 0))
+
+        params = {"q": "Unit Testing Page Error", "page_size": 20}
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertEqual(response.json()["status"], "failed")
+
+        # cleanup
+        await self.cleanup_redis()
+
+    @patch("app.views.Movies.search_page")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_prefetch_next_page(self, mock_iter_directors, mock_search_page):
+        """Testing next Movies Search page is prefetched into cache"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+
+        async def search_page(search_param, page):
+            return 200, copy.deepcopy(movies[int(page) - 1])
+
+        mock_search_page.side_effect = search_page
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing Prefetch",
+            "page": 1,
+        }
+        self.cached_keys.extend(Movies.cache_key(params["q"], page) for page in [1, 2])
+        with patch.object(curr_config, "MOVIES_PREFETCH_DEPTH", 1):
+            response = await self.client.get(self.url, query_params=params)
+            self.assertEqual(response.status_code, 200)
+
+            # wait for background prefetch
+            await asyncio.sleep(0.5)
+            self.assertEqual(mock_search_page.call_count, 2)
+            async with self.redis.connect() as redis_conn:
+                self.assertIsNotNone(await redis_conn.get(Movies.cache_key(params["q"], 2)))
+
+            # next page served from cache, last page has nothing to prefetch
+            params.update({"page": 2})
+            response = await self.client.get(self.url, query_params=params)
+            self.assertEqual(response.status_code, 200)
+            await asyncio.sleep(0.1)
+            self.assertEqual(mock_search_page.call_count, 2)
+
+            # cache hits schedule no prefetch
+            with patch("app.views.Movies.prefetch") as mock_prefetch:
+                params.update({"page": 1})
+                response = await self.client.get(self.url, query_params=params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(mock_prefetch.call_count, 0)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    async def test_movies_invalid_page_size(self):
+        """Testing Movies Search API page size validation"""
+        params = {
+            "q": "Unit Testing",
+            "page_size": 500,
+        }
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 400)
+        response = response.json()
+        self.assertEqual(response["status"], "failed")
+        self.assertIn("Invalid page / page_size / offset", response["error"]["message"])
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.connector.OMDBConnector._fetch_director")
+    async def test_movies_stream(self, mock_fetch_director, mock_process_request):
+        """Testing Movies Search API streams a line per movie as NDJSON"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+
+        async def fetch_director(movie_id, sem):
+            return {"id": movie_id, "director": dir_response.get(movie_id)}
+
+        mock_fetch_director.side_effect = fetch_director
+
+        params = {
+            "q": "Unit Testing Stream"
+        }
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        self.cached_keys.extend(
+            OMDBConnector.director_cache_key(movie["imdbID"]) for movie in movies[0]["Search"]
+        )
+        await self.cleanup_redis()
+        response = await self.client.get(
+            self.url, query_params=params, headers={"Accept": "application/x-ndjson"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        events = [json.loads(line) for line in content.decode().splitlines()]
+
+        self.assertEqual(events[0]["event"], "search")
+        self.assertEqual(events[0]["total_results"], 20)
+        self.assertEqual(len(events[0]["titles"]), 10)
+        movie_events = [event for event in events if event["event"] == "movie"]
+        self.assertEqual(len(movie_events), 10)
+        self.assertEqual(
+            sorted(event["index"] for event in movie_events), list(range(10))
+        )
+        self.assertEqual(events[-1]["event"], "done")
+
+        # streamed result is cached for the next request
+        async with self.redis.connect() as redis_conn:
+            self.assertIsNotNone(await redis_conn.get(Movies.cache_key(params["q"], 1)))
+
+        # cleanup
+        await self.cleanup_redis()
+
     @patch("app.views.OMDBConnector.process_request")
     async def test_movies_api_error(self, mock_process_request):
         """Testing Movies Search API Error response"""
@@ -212,3 +553,407 @@ class TestMoviesSearch(TestBase):
         self.assertEqual(response["error"]["message"], "Error response from provider, try again later.")
         resp_keys = response["error"].keys()
         [self.assertIn(key, resp_keys) for key in movies.keys()]
+
+    @patch("app.connector.OMDBConnector._fetch_director")
+    async def test_movies_directors_cache(self, mock_fetch_director):
+        """Testing director lookups are served from imdbID cache"""
+        # mocks
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+
+        async def fetch_director(movie_id, sem):
+            return {"id": movie_id, "director": dir_response[movie_id]}
+
+        mock_fetch_director.side_effect = fetch_director
+        m_ids = list(dir_response.keys())
+        self.cached_keys.extend(OMDBConnector.director_cache_key(_id) for _id in m_ids)
+        await self.cleanup_redis()
+
+        response = await OMDBConnector({}).get_directors(movies=m_ids)
+        self.assertEqual(response, dir_response)
+        self.assertEqual(mock_fetch_director.call_count, len(m_ids))
+
+        # served from cache, no upstream lookups
+        response = await OMDBConnector({}).get_directors(movies=m_ids)
+        self.assertEqual(response, dir_response)
+        self.assertEqual(mock_fetch_director.call_count, len(m_ids))
+
+        # unknown directors are cached briefly
+        async with self.redis.connect() as redis_conn:
+            ttl = await redis_conn.ttl(OMDBConnector.director_cache_key("tt1872181"))
+        self.assertTrue(0 < ttl <= curr_config.DIRECTOR_NEGATIVE_CACHE_TTL)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.connector.OMDBConnector._fetch_director")
+    async def test_movies_latency_budget(self, mock_fetch_director, mock_process_request):
+        """Testing slow directors are returned pending & cached in background"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        slow_id = "tt10872600"
+
+        async def fetch_director(movie_id, sem):
+            if movie_id == slow_id:
+                await asyncio.sleep(0.5)
+            return {"id": movie_id, "director": dir_response.get(movie_id, "N/A")}
+
+        mock_fetch_director.side_effect = fetch_director
+        m_ids = [movie["imdbID"] for movie in movies[0]["Search"]]
+        params = {
+            "q": "Unit Testing Latency",
+            "max_latency_ms": 100,
+        }
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        self.cached_keys.extend(OMDBConnector.director_cache_key(_id) for _id in m_ids)
+        await self.cleanup_redis()
+
+        started = time.monotonic()
+        response = await self.client.get(self.url, query_params=params)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(response.status_code, 200)
+        response = response.json()
+        self.assertEqual(response["pending"], 1)
+        pending = [movie for movie in response["results"] if movie.get("pending")]
+        self.assertEqual(pending, [{"title": "Spider-Man: No Way Home", "director": None, "pending": True}])
+
+        # lookups complete in background, next request gets the full result
+        await asyncio.sleep(0.6)
+        response = await self.client.get(self.url, query_params=params)
+        response = response.json()
+        self.assertNotIn("pending", response)
+        self.assertEqual(response["results"][0]["director"], "Jon Watts")
+        self.assertEqual(mock_process_request.call_count, 1)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    async def test_movies_invalid_max_latency(self):
+        """Testing Movies Search API latency budget validation"""
+        params = {
+            "q": "Unit Testing Latency",
+            "max_latency_ms": "fast",
+        }
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "failed")
+
+    @patch("app.views.Movies.search_page")
+    async def test_movies_overlapping_fetches(self, mock_search_page):
+        """Testing an earlier fetch finishing first keeps the later one in progress"""
+        delays = [0.05, 0.3]
+
+        async def search_page(search_param, page):
+            await asyncio.sleep(delays.pop(0))
+            return 503, {"Response": "False", "Error": "Service Unavailable"}
+
+        mock_search_page.side_effect = search_page
+        cache_key = Movies.cache_key("Unit Testing Overlap", 1)
+        first = asyncio.ensure_future(Movies.fetch_page("Unit Testing Overlap", 1, cache_key))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(Movies.fetch_page("Unit Testing Overlap", 1, cache_key))
+        await first
+        self.assertIn(cache_key, Movies.in_progress)
+        await second
+        self.assertNotIn(cache_key, Movies.in_progress)
+
+    async def test_omdb_rate_limiter(self):
+        """Testing cluster wide rate limiter budget"""
+        with self.assertRaisesRegex(ValueError, "No rate limit configured for 'unknown'"):
+            RateLimiter("unknown")
+
+        limiter = RateLimiter("omdb", rate=1, burst=2, max_wait=0)
+        limiter.key = "ratelimit:unit-test"
+        self.cached_keys.append(limiter.key)
+        await self.cleanup_redis()
+
+        # burst allowed, next request over budget fails without waiting
+        self.assertTrue(await limiter.acquire())
+        self.assertTrue(await limiter.acquire())
+        self.assertFalse(await limiter.acquire())
+
+        # queues for the next token within max wait
+        limiter.max_wait = 2
+        self.assertTrue(await limiter.acquire())
+
+        # cleanup
+        await self.cleanup_redis()
+
+    def test_circuit_breaker(self):
+        """Testing circuit breaker opens, fails fast & recovers"""
+        breaker = CircuitBreaker("unit-test", failure_threshold=2, reset_timeout=0.1)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        # single trial request once reset timeout passes
+        time.sleep(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    @patch("app.views.OMDBConnector.process_request")
+    async def test_movies_not_found(self, mock_process_request):
+        """Testing Movies Search API with no matching movies"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_error_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies, 200),
+        )
+
+        params = {
+            "q": "askfmladnotfound"
+        }
+        self.cached_keys.append(Movies.negative_cache_key(params["q"], 1))
+        await self.cleanup_redis()
+        CacheStats.reset()
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 404)
+        response = response.json()
+        self.assertEqual(response["status"], "failed")
+        self.assertEqual(response["status_code"], 404)
+        self.assertEqual(response["error"]["Error"], movies["Error"])
+
+        # not found is cached briefly, repeated search skips OMDB
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(mock_process_request.call_count, 1)
+        self.assertEqual(CacheStats.snapshot()["movies-negative.hits"], 1)
+        async with self.redis.connect() as redis_conn:
+            ttl = await redis_conn.ttl(self.cached_keys[-1])
+        self.assertTrue(0 < ttl <= curr_config.MOVIES_NEGATIVE_CACHE_TTL)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.Movie.asearch")
+    async def test_movies_transient_error_not_cached(self, mock_asearch, mock_process_request):
+        """Testing provider errors are not negatively cached"""
+        # mocks, catalog has no matches to fall back to
+        mock_process_request.side_effect = mock_args_async(
+            return_val=({"Response": "False", "Error": "Service Unavailable"}, 503),
+        )
+        mock_asearch.side_effect = mock_args_async(return_val=([], 0))
+
+        params = {
+            "q": "askfmladunavailable"
+        }
+        for _ in range(2):
+            response = await self.client.get(self.url, query_params=params)
+            self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_process_request.call_count, 2)
+        self.assertEqual(mock_asearch.call_count, 2)
+        async with self.redis.connect() as redis_conn:
+            self.assertFalse(await redis_conn.exists(Movies.negative_cache_key(params["q"], 1)))
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_added_to_catalog(self, mock_iter_directors, mock_process_request):
+        """Testing searched movies are added to the local catalog"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+
+        params = {
+            "q": "Unit Testing Catalog"
+        }
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        await self.cleanup_redis()
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["source"], "omdb")
+
+        m_ids = [movie["imdbID"] for movie in movies[0]["Search"]]
+        catalog = {movie.imdb_id: movie async for movie in Movie.objects.filter(imdb_id__in=m_ids)}
+        self.assertEqual(len(catalog), 10)
+        self.assertEqual(catalog["tt10872600"].director, "Jon Watts")
+        # unknown directors are not stored
+        self.assertIsNone(catalog["tt1872181"].director)
+        self.assertIsNone(catalog["tt9362722"].director)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    async def test_movies_catalog_search(self):
+        """Testing catalog search matches every word of the query"""
+        await Movie.aupsert([
+            {"imdbID": "tt0000901", "Title": "Catalog Test Spider Story", "Year": "2001"},
+            {"imdbID": "tt0000902", "Title": "Catalog Test Spider Man", "Year": "2002"},
+            {"imdbID": "tt0000903", "Title": "Catalog Test Iron Man", "Year": "2003"},
+        ])
+        movies, total = await Movie.asearch("catalog test spider", limit=1)
+        self.assertEqual(total, 2)
+        self.assertEqual(len(movies), 1)
+        movies, total = await Movie.asearch("catalog test man")
+        self.assertEqual({movie.imdb_id for movie in movies}, {"tt0000902", "tt0000903"})
+        self.assertEqual(await Movie.asearch("!!"), ([], 0))
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.Movie.asearch")
+    async def test_movies_catalog_fallback(self, mock_asearch, mock_process_request):
+        """Testing Movies Search API served from catalog while provider is rate limited"""
+        # mocks
+        mock_process_request.side_effect = mock_args_async(
+            return_val=({"Response": "False", "Error": "Rate limit exceeded."}, 429),
+        )
+        catalog = [Movie(imdb_id="tt10872600", title="Spider-Man: No Way Home", director="Jon Watts")]
+        mock_asearch.side_effect = mock_args_async(return_val=(catalog, 1))
+
+        params = {
+            "q": "Unit Testing Fallback"
+        }
+        response = await self.client.get(self.url, query_params=params)
+        self.assertEqual(response.status_code, 200)
+        response = response.json()
+        self.assertEqual(response["status"], "success")
+        self.assertEqual(response["source"], "catalog")
+        self.assertEqual(response["total_results"], 1)
+        self.assertEqual(
+            response["results"], [{"title": "Spider-Man: No Way Home", "director": "Jon Watts"}]
+        )
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    @patch("app.views.Movie.asearch")
+    async def test_movies_auto_source_cached(self, mock_asearch, mock_iter_directors, mock_process_request):
+        """Testing auto source answers cached searches without the catalog"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+        mock_asearch.side_effect = mock_args_async(return_val=([], 0))
+
+        params = {
+            "q": "Unit Testing Auto Source",
+            "source": "auto",
+        }
+        self.cached_keys.append(Movies.cache_key(params["q"], 1))
+        await self.cleanup_redis()
+        for _ in range(3):
+            response = await self.client.get(self.url, query_params=params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["source"], "omdb")
+
+        # catalog asked on the first miss only
+        self.assertEqual(mock_process_request.call_count, 1)
+        self.assertEqual(mock_asearch.call_count, 1)
+
+        # cleanup
+        await self.cleanup_redis()
+
+    @patch("app.views.OMDBConnector.process_request")
+    @patch("app.views.OMDBConnector.iter_directors")
+    async def test_movies_popularity_cache_warming(self, mock_iter_directors, mock_process_request):
+        """Testing searched pages are ranked by popularity & warmed into cache"""
+        # mocks
+        movies = copy.deepcopy(sample_movie_search_response)
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(movies[0], 200),
+        )
+        directors = copy.deepcopy(sample_movie_director_fetch_response)
+        dir_response = {dir["imdbID"]: dir["Director"] for dir in directors}
+        mock_iter_directors.side_effect = mock_iter_async(dir_response)
+        key_patcher = patch.object(movies_popularity, "key", "popularity:unittest")
+        key_patcher.start()
+        self.addCleanup(key_patcher.stop)
+        self.cached_keys.extend([movies_popularity.key, movies_popularity.decay_key])
+
+        for q in ["Unit Testing Popular", " unit testing POPULAR", "Unit Testing Rare"]:
+            self.cached_keys.append(Movies.cache_key(q, 1))
+            response = await self.client.get(self.url, query_params={"q": q})
+            self.assertEqual(response.status_code, 200)
+        await asyncio.gather(*background_tasks)
+
+        top = await movies_popularity.top(10)
+        self.assertEqual(
+            top, [("1|unit testing popular", 2.0), ("1|unit testing rare", 1.0)]
+        )
+
+        # cache flushed, most popular page warmed
+        async with self.redis.connect() as redis_conn:
+            await redis_conn.delete(*self.cached_keys[2:])
+        movies_l1.clear()
+        mock_process_request.reset_mock()
+        stats = await WarmMoviesCache().warm(top=1, concurrency=2, force=False)
+        self.assertEqual(stats["total"], 1)
+        self.assertEqual(stats["warmed"], 1)
+        self.assertEqual(mock_process_request.call_count, 1)
+        cached_resp, is_stale = await Movies.get_cached(Movies.cache_key("Unit Testing Popular", 1))
+        self.assertEqual(len(cached_resp["results"]), 10)
+        self.assertFalse(is_stale)
+
+        # fresh pages are not fetched again
+        stats = await WarmMoviesCache().warm(top=1, concurrency=2, force=False)
+        self.assertEqual(stats["cached"], 1)
+        self.assertEqual(mock_process_request.call_count, 1)
+
+        # cleanup
+        await self.cleanup_redis()
+
+
+@pytest.mark.asyncio
+class TestMovieSuggest(TestBase):
+    """Testcases related to Movie Suggest API"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("movies_suggest")
+
+    async def test_movies_suggest(self):
+        """Testing suggestions ranked by popularity"""
+        title_index.add({
+            "Unittestsuggest Returns": 1,
+            "Unittestsuggest Begins": 5,
+            "The Unittestsuggest": 3,
+        })
+        response = await self.client.get(self.url, query_params={"prefix": "unittestsugg", "limit": 2})
+        self.assertEqual(response.status_code, 200)
+        response = response.json()
+        self.assertEqual(response["status"], "success")
+        self.assertEqual(
+            response["suggestions"], ["Unittestsuggest Begins", "The Unittestsuggest"]
+        )
+
+    async def test_movies_suggest_max_titles(self):
+        """Testing least popular titles are dropped beyond the max titles"""
+        index = TitleIndex(key="suggest:unittest", max_titles=10)
+        index.add({f"Unittestcap {number}": number for number in range(1, 11)})
+        self.assertEqual(len(index), 10)
+        index.add({"Unittestcap Popular": 100})
+        self.assertEqual(len(index), 9)
+        self.assertEqual(index.suggest("unittestcap", limit=1), ["Unittestcap Popular"])
+        self.assertNotIn("Unittestcap 2", index.suggest("unittestcap", limit=20))
+        self.assertIn("Unittestcap 3", index.suggest("unittestcap", limit=20))
+
+        # redis keeps the most popular titles only
+        await index.record([f"Unittestcap Recorded {number}" for number in range(12)])
+        async with index._redis.connect() as redis_conn:
+            self.assertEqual(await redis_conn.zcard(index.key), 10)
+            await redis_conn.delete(index.key)
+
+    async def test_movies_suggest_invalid_limit(self):
+        """Testing suggestions limit validation"""
+        response = await self.client.get(self.url, query_params={"prefix": "spi", "limit": 500})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "failed")
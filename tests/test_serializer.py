@@ -0,0 +1,64 @@
+import uuid
+import datetime
+from parameterized import parameterized
+
+from conftest import TestBase
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from app.codec import codec
+from app.serializer import JSONSerializer, OrjsonSerializer, RawJSON
+
+
+class TestSerializer(TestBase):
+    """Testcases related to JSON serializer of responses & cache values"""
+
+    @parameterized.expand([("json", JSONSerializer), ("orjson", OrjsonSerializer)])
+    def test_serializer_types(self, name, serializer_class):
+        """Testing datetimes, UUIDs & raw JSON are serialized alike by backends"""
+        serializer = serializer_class()
+        value = {
+            "job_id": uuid.UUID(int=1),
+            "created_time": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            "result": RawJSON(b'{"wages":[1,2]}'),
+        }
+        data = serializer.dumps(value)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(
+            serializer.loads(data),
+            {
+                "job_id": "00000000-0000-0000-0000-000000000001",
+                "created_time": "2025-01-02T03:04:05Z",
+                "result": {"wages": [1, 2]},
+            },
+        )
+        self.assertEqual(serializer.dumps(RawJSON(b"[1]")), b"[1]")
+
+    @parameterized.expand([("json", JSONSerializer), ("orjson", OrjsonSerializer)])
+    def test_serializer_datetime_format(self, name, serializer_class):
+        """Testing datetimes are formatted as by DjangoJSONEncoder (milliseconds)"""
+        serializer = serializer_class()
+        value = {
+            "utc": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "offset": datetime.datetime(
+                2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone(datetime.timedelta(hours=5))
+            ),
+            "naive": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901),
+            "date": datetime.date(2025, 1, 2),
+            "time": datetime.time(3, 4, 5, 678901),
+        }
+        self.assertEqual(
+            serializer.loads(serializer.dumps(value)),
+            {key: DjangoJSONEncoder().default(item) for key, item in value.items()},
+        )
+        self.assertEqual(serializer.loads(serializer.dumps(value))["utc"], "2025-01-02T03:04:05.678Z")
+
+    def test_codec_decode_raw(self):
+        """Testing cached values are decoded to JSON bytes without parsing"""
+        value = {"results": ["title"] * 500}
+        encoded = codec.encode(value)
+        self.assertLess(len(encoded), 1024)  # compressed
+        raw = codec.decode_raw(encoded)
+        self.assertIsInstance(raw, RawJSON)
+        self.assertEqual(codec.decode(encoded), value)
+        self.assertEqual(codec.decode(codec.encode(raw)), value)
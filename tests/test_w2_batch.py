@@ -0,0 +1,222 @@
+import io
+import os
+import uuid
+import zipfile
+import pytest
+from unittest.mock import patch
+from parameterized import parameterized
+
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from conftest import TestBase
+from _test_utils import mock_args_async
+from _test_constants import sample_w2_success_response
+
+from app import uploads
+from app.models import JobTracker
+from app.workers import enqueue_w2_batch, process_w2_forms
+
+
+async def run_calls(task, calls):
+    """Runs the enqueued calls directly, in place of the broker."""
+    for call in calls:
+        await task(*call)
+
+
+@pytest.mark.asyncio
+class TestW2Batch(TestBase):
+    """Testcases related to W2 Batch (POST / GET) API"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("w2_batch")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.batch_ids = []
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if cls.batch_ids:
+            JobTracker.objects.filter(id__in=cls.batch_ids).delete()
+        cls.cleanup()
+
+    @staticmethod
+    def zip_file(files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return SimpleUploadedFile(
+            "forms.zip", buffer.getvalue(), content_type="application/zip"
+        )
+
+    @parameterized.expand(
+        [
+            ("no_file", None, "W-2 forms missing in request, Upload forms or a zip archive to proceed."),
+            (
+                "invalid_filetype",
+                {"sample.png": b"\x89PNG\r\n\x1a\n image", "sample.csv": b"sample,csv,content"},
+                "sample.csv - Invalid file format, Allowed Types (.png, .jpeg, .pdf).",
+            ),
+            ("invalid_zip", "not a zip", "Invalid zip archive."),
+        ]
+    )
+    async def test_w2_batch_validations(self, name, files, expected_message):
+        """Testing W2 batch POST API validations"""
+        if isinstance(files, dict):
+            response = await self.client.post(self.url, {"file": self.zip_file(files)})
+        elif files:
+            archive = SimpleUploadedFile("forms.zip", files.encode(), content_type="application/zip")
+            response = await self.client.post(self.url, {"file": archive})
+        else:
+            response = await self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 400)
+        response = response.json()
+        self.assertEqual(response["status"], "failed")
+        self.assertEqual(response["error"]["message"], expected_message)
+
+    @patch("app.views.enqueue_w2_batch.kiq")
+    @patch("app.workers.GeminiConnector.file_upload")
+    @patch("app.workers.GeminiConnector.process_request")
+    async def test_w2_batch_success(self, mock_process_request, mock_file_upload, mock_enqueue):
+        """Testing W2 batch POST queues a job per file & GET pages the results"""
+        content = uuid.uuid4().hex.encode()
+        files = [
+            SimpleUploadedFile("first.pdf", b"%PDF-" + content, content_type="application/pdf"),
+            SimpleUploadedFile("second.png", b"\x89PNG\r\n\x1a\n" + content, content_type="image/png"),
+            self.zip_file({
+                "forms/third.pdf": b"%PDF-3" + content,
+                "forms/fourth.jpg": b"\xff\xd8\xff" + content,
+                "__MACOSX/forms/._third.pdf": b"skipped",
+            }),
+        ]
+
+        # mocks, enqueued calls are left pending
+        mock_enqueue.side_effect = mock_args_async()
+        response = await self.client.post(self.url, {"file": files})
+        self.assertEqual(response.status_code, 201)
+        response = response.json()
+        self.assertEqual(response["status"], "queued")
+        self.assertEqual((response["total"], response["queued"], response["reused"]), (4, 4, 0))
+        self.batch_ids.append(response["batch_id"])
+
+        # all jobs enqueued in one message
+        self.assertEqual(mock_enqueue.call_count, 1)
+        (calls,) = mock_enqueue.call_args.args
+        self.assertEqual(
+            [mime_type for _, _, mime_type in calls],
+            ["application/pdf", "image/png", "application/pdf", "image/jpeg"],
+        )
+
+        url = reverse("w2_batch_response", args=[response["batch_id"]])
+        pending = await self.client.get(url)
+        self.assertEqual(pending.status_code, 200)
+        self.assertEqual(pending["Cache-Control"], "private, no-cache")
+        pending = pending.json()
+        self.assertEqual(pending["status"], JobTracker.Status.QUEUED)
+        self.assertEqual(pending["progress"]["queued"], 4)
+        self.assertEqual(pending["results"], [])
+
+        # process the queued jobs
+        mock_file_upload.side_effect = mock_args_async(return_val=(True, "Mock"))
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(True, sample_w2_success_response)
+        )
+        await run_calls(process_w2_forms, calls)
+
+        response = await self.client.get(url, {"page": 2, "page_size": 3})
+        self.assertEqual(response.status_code, 200)
+        response = response.json()
+        self.assertEqual(response["status"], JobTracker.Status.SUCCESS)
+        self.assertEqual(response["progress"]["completed"], 4)
+        self.assertEqual(response["progress"]["percent"], 100.0)
+        self.assertEqual(response["total_pages"], 2)
+        self.assertEqual(len(response["results"]), 1)
+        result = response["results"][0]
+        self.assertIn(result["file_name"], ["first.pdf", "second.png", "third.pdf", "fourth.jpg"])
+        ssn = result["result"]["employee_info"]["ssn"]
+        self.assertTrue(ssn[:-4] == "X" * (len(ssn) - 4))
+
+        # resubmitted files reuse the results
+        mock_enqueue.reset_mock()
+        repeat = SimpleUploadedFile("first.pdf", b"%PDF-" + content, content_type="application/pdf")
+        response = await self.client.post(self.url, {"file": [repeat]})
+        self.assertEqual(response.status_code, 201)
+        response = response.json()
+        self.assertEqual((response["total"], response["queued"], response["reused"]), (1, 0, 1))
+        self.assertEqual(mock_enqueue.call_count, 0)
+        self.batch_ids.append(response["batch_id"])
+
+    @patch("app.views.enqueue_w2_batch.kiq")
+    @patch("app.views.JobTracker.afind_reusable_many")
+    async def test_w2_batch_failure_cleanup(self, mock_find_reusable, mock_enqueue):
+        """Testing saved files of a batch are removed when it fails before queueing"""
+        mock_find_reusable.side_effect = Exception("Mock error")
+        content = uuid.uuid4().hex.encode()
+        files = [
+            SimpleUploadedFile("first.pdf", b"%PDF-" + content, content_type="application/pdf"),
+            SimpleUploadedFile("second.png", b"\x89PNG\r\n\x1a\n" + content, content_type="image/png"),
+        ]
+        saved = []
+
+        async def save_w2_file(w2_form):
+            upload = await uploads.save_w2_file(w2_form)
+            saved.append(upload.path)
+            return upload
+
+        with patch("app.views.save_w2_file", side_effect=save_w2_file):
+            response = await self.client.post(self.url, {"file": files})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(saved), 2)
+        self.assertFalse(any(os.path.exists(path) for path in saved))
+        self.assertEqual(mock_enqueue.call_count, 0)
+
+    @patch("app.workers.process_w2_forms.kiq")
+    async def test_w2_batch_enqueue_jobs(self, mock_kiq):
+        """Testing jobs of a batch failing to be enqueued are failed & their files removed"""
+        batch = await JobTracker.objects.acreate(
+            id=uuid.uuid4().hex, status=JobTracker.Status.QUEUED, batch_size=2
+        )
+        self.batch_ids.append(batch.id)
+        calls = []
+        for name in ["first.pdf", "second.pdf"]:
+            job = await JobTracker.objects.acreate(
+                id=uuid.uuid4().hex, status=JobTracker.Status.QUEUED, batch=batch, file_name=name
+            )
+            upload = await uploads.save_w2_file(
+                SimpleUploadedFile(name, b"%PDF-" + uuid.uuid4().hex.encode())
+            )
+            calls.append([job.id, upload.path, "application/pdf"])
+
+        # mocks, second job not enqueued
+        async def kiq(job_id, filepath, mime_type):
+            if job_id == calls[1][0]:
+                raise ConnectionError("Mock broker error")
+
+        mock_kiq.side_effect = kiq
+        await enqueue_w2_batch(calls)
+        self.assertEqual([call.args[0] for call in mock_kiq.call_args_list], [calls[0][0], calls[1][0]])
+
+        jobs = {job.id.hex: job async for job in JobTracker.objects.filter(batch=batch)}
+        self.assertEqual(jobs[calls[0][0]].status, JobTracker.Status.QUEUED)
+        self.assertEqual(jobs[calls[1][0]].status, JobTracker.Status.FAILED)
+        self.assertTrue(os.path.exists(calls[0][1]))
+        self.assertFalse(os.path.exists(calls[1][1]))
+
+    @parameterized.expand(
+        [
+            ("unknown_batch", {}, 400),
+            ("invalid_page_size", {"page_size": 1000}, 400),
+        ]
+    )
+    async def test_w2_batch_get_validations(self, name, params, status_code):
+        """Testing W2 batch GET API validations"""
+        url = reverse("w2_batch_response", args=[uuid.uuid4().hex])
+        response = await self.client.get(url, params)
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(response.json()["status"], "failed")
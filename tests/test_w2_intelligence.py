@@ -1,5 +1,7 @@
 import os
 import uuid
+import asyncio
+import hashlib
 import pytest
 from unittest.mock import patch
 from parameterized import parameterized
@@ -11,8 +13,17 @@ from conftest import TestBase
 from _test_utils import mock_args, mock_args_async, mock_execute
 from _test_constants import sample_w2_success_response, sample_w2_error_response
 
+from app.cache import IdempotencyKeys
 from app.models import JobTracker
-from app.workers import process_w2_forms
+from app.uploads import (
+    IDEMPOTENCY_RESERVATION,
+    INVALID_FILE_TYPE,
+    MISSING_FILE,
+    STREAMED_UPLOAD,
+    StreamingUploadApp,
+)
+from app.connector import GeminiConnector
+from app.workers import process_w2_forms, worker_shutdown, worker_startup
 
 
 @pytest.mark.asyncio
@@ -169,6 +180,30 @@ class TestW2Get(TestBase):
         # clean up
         self.tracker_ids.append(job.id)
 
+    async def test_w2_get_conditional(self):
+        """Testing W2 GET API ETag & 304 for unchanged job details"""
+        job = JobTracker(status=JobTracker.Status.IN_PROGRESS)
+        await job.asave()
+        self.tracker_ids.append(job.id)
+        url = reverse("w2_response", kwargs={"job_id": job.id.hex})
+
+        response = await self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        etag = response["ETag"]
+
+        # unchanged job, result not sent again
+        response = await self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        # finished job, new version cacheable by the client
+        await job.amark(status=job.Status.SUCCESS)
+        response = await self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn("max-age=", response["Cache-Control"])
+
 
 class TestW2Process(TestBase):
     """Testcases related to W2 Process (POST) API"""
@@ -260,3 +295,220 @@ class TestW2Process(TestBase):
 
         # clean up
         self.tracker_ids.append(job.id)
+
+    @patch("app.views.process_w2_forms.kiq")
+    @patch("app.workers.GeminiConnector.file_upload")
+    @patch("app.workers.GeminiConnector.process_request")
+    async def test_w2_post_duplicate_reused(
+        self, mock_process_request, mock_file_upload, mock_kiq
+    ):
+        """Testing W2 POST API reuses result of an already processed file"""
+
+        # mocks
+        mock_kiq.side_effect = mock_execute(executable_func=process_w2_forms)
+        mock_file_upload.side_effect = mock_args_async(return_val=(True, "Mock"))
+        mock_process_request.side_effect = mock_args_async(
+            return_val=(True, sample_w2_success_response)
+        )
+
+        content = f"duplicate w2 {uuid.uuid4().hex}".encode()
+        job_ids = []
+        for _ in range(2):
+            sample_file = SimpleUploadedFile(
+                "sample.pdf", content, content_type="application/pdf"
+            )
+            post_response = await self.client.post(self.url, {"file": sample_file})
+            self.assertEqual(post_response.status_code, 201)
+            job_ids.append(post_response.json()["job_id"])
+        self.tracker_ids.extend(job_ids)
+
+        # processed only once, second job points at the first result
+        self.assertEqual(mock_kiq.call_count, 1)
+        self.assertNotEqual(job_ids[0], job_ids[1])
+        job = await JobTracker.objects.filter(id=job_ids[1]).afirst()
+        self.assertEqual(job.status, job.Status.SUCCESS)
+        self.assertEqual(job.source_job_id.hex, job_ids[0])
+
+        responses = [
+            (await self.client.get(reverse("w2_response", kwargs={"job_id": job_id}))).json()
+            for job_id in job_ids
+        ]
+        self.assertEqual(responses[1]["status"], job.Status.SUCCESS)
+        self.assertEqual(responses[1]["result"], responses[0]["result"])
+
+    @patch("app.views.process_w2_forms.kiq")
+    async def test_w2_post_idempotency_key(self, mock_kiq):
+        """Testing W2 POST API retries with Idempotency-Key are processed once"""
+
+        # mocks, slow enqueue so the duplicate arrives while it runs
+        async def kiq(*args, **kwargs):
+            await asyncio.sleep(0.2)
+
+        mock_kiq.side_effect = kiq
+
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        content = f"idempotent w2 {uuid.uuid4().hex}".encode()
+
+        def post():
+            sample_file = SimpleUploadedFile("sample.png", content, content_type="image/png")
+            return self.client.post(self.url, {"file": sample_file}, headers=headers)
+
+        # either request may reserve the key first
+        responses = await asyncio.gather(post(), post())
+        duplicate, first = sorted(responses, key=lambda response: response.status_code)
+        self.assertEqual([duplicate.status_code, first.status_code], [200, 201])
+        self.assertEqual(duplicate["Idempotent-Replayed"], "true")
+        job_id = first.json()["job_id"]
+        self.assertEqual(duplicate.json()["job_id"], job_id)
+        self.assertEqual(duplicate.json()["status"], JobTracker.Status.QUEUED)
+
+        retry = await post()
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json()["job_id"], job_id)
+        self.assertEqual(mock_kiq.call_count, 1)
+
+        # clean up
+        self.tracker_ids.append(job_id)
+
+    async def test_w2_idempotency_lost_reservation(self):
+        """Testing a request completing after its lease expired keeps the newer result"""
+        keys = IdempotencyKeys("idempotency:test", ttl=60, lease=1)
+        key = uuid.uuid4().hex
+
+        stale_token, _ = await keys.reserve(key)
+        await keys.release(key, stale_token)
+        token, _ = await keys.reserve(key)
+        await keys.complete(key, token, {"job_id": "current"})
+
+        # completion with the lost reservation is ignored
+        await keys.complete(key, stale_token, {"job_id": "stale"})
+        self.assertEqual(await keys.reserve(key), (None, {"job_id": "current"}))
+
+    async def test_w2_worker_gemini_client(self):
+        """Testing tasks of a worker share one Gemini client till shutdown"""
+        await worker_startup(None)
+        client = GeminiConnector().client
+        self.assertIs(GeminiConnector().client, client)
+
+        await worker_shutdown(None)
+        self.assertIsNot(GeminiConnector().client, client)
+        await worker_shutdown(None)
+
+
+@pytest.mark.asyncio
+class TestW2StreamedUpload(TestBase):
+    """Testcases related to W-2 uploads streamed to disk before Django"""
+
+    boundary = "w2-boundary"
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.cleanup()
+
+    def multipart(self, content, filename="sample.png"):
+        return (
+            f"--{self.boundary}\r\n"
+            'Content-Disposition: form-data; name="note"\r\n\r\n'
+            f"ignored\r\n--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            "Content-Type: image/png\r\n\r\n"
+        ).encode() + content + f"\r\n--{self.boundary}--\r\n".encode()
+
+    async def stream(self, body, chunk_size=7, max_size=1024):
+        """Sends body in chunks through the upload app, returns the upload."""
+        scope = await self.stream_scope(body, chunk_size=chunk_size, max_size=max_size)
+        return scope[STREAMED_UPLOAD]
+
+    async def stream_scope(self, body, chunk_size=7, max_size=1024, headers=(), idempotency=None):
+        """Sends body in chunks through the upload app, returns inner scope."""
+        scopes = []
+
+        async def inner_app(scope, receive, send):
+            scopes.append(scope)
+            self.assertEqual(await receive(), {"type": "http.request", "body": b"", "more_body": False})
+
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        messages = [
+            {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+            for i, chunk in enumerate(chunks)
+        ]
+
+        async def receive():
+            return messages.pop(0)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": reverse("w2_process"),
+            "headers": [
+                (b"content-type", f"multipart/form-data; boundary={self.boundary}".encode()),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        }
+        app = StreamingUploadApp(
+            inner_app, reverse("w2_process"), max_size=max_size, idempotency=idempotency
+        )
+        await app(scope, receive, None)
+        self.assertEqual(len(scopes), 1)
+        self.assertIn((b"content-length", b"0"), scopes[0]["headers"])
+        return scopes[0]
+
+    async def test_streamed_upload_success(self):
+        """Testing W-2 file split across chunks is written & hashed in one pass"""
+        content = b"\x89PNG\r\n\x1a\n" + os.urandom(300)
+        upload = await self.stream(self.multipart(content, filename="../w2 form.png"))
+
+        self.assertIsNone(upload.error)
+        self.assertEqual(upload.content_type, "image/png")
+        self.assertEqual(upload.size, len(content))
+        self.assertEqual(upload.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(os.path.basename(upload.path), f"{upload.id[:6]}_w2_form.png")
+        with open(upload.path, "rb") as tmp_file:
+            self.assertEqual(tmp_file.read(), content)
+
+    @parameterized.expand(
+        [
+            ("invalid_filetype", b"sample,csv,content", 400, INVALID_FILE_TYPE),
+            ("too_large", b"%PDF-" + b"0" * 2048, 413, "W-2 form too large, Maximum size is 0 MB."),
+        ]
+    )
+    async def test_streamed_upload_rejected(self, name, content, status_code, message):
+        """Testing W-2 uploads of other types or over the size limit are dropped"""
+        upload = await self.stream(self.multipart(content))
+        self.assertEqual(upload.status_code, status_code)
+        self.assertEqual(upload.error, message)
+        self.assertIsNone(upload.path)
+
+    async def test_streamed_upload_missing_file(self):
+        """Testing multipart request without W-2 file is rejected"""
+        body = (
+            f"--{self.boundary}\r\n"
+            'Content-Disposition: form-data; name="note"\r\n\r\n'
+            f"no file\r\n--{self.boundary}--\r\n"
+        ).encode()
+        upload = await self.stream(body)
+        self.assertEqual(upload.status_code, 400)
+        self.assertEqual(upload.error, MISSING_FILE)
+
+    async def test_streamed_upload_idempotency_replay(self):
+        """Testing replays of an Idempotency-Key are passed on without writing the file"""
+        keys = IdempotencyKeys("idempotency:test", ttl=60)
+        key = uuid.uuid4().hex
+        headers = [(b"idempotency-key", key.encode())]
+        body = self.multipart(b"\x89PNG\r\n\x1a\n" + os.urandom(300))
+
+        scope = await self.stream_scope(body, headers=headers, idempotency=keys)
+        token, result = scope[IDEMPOTENCY_RESERVATION]
+        self.assertIsNotNone(token)
+        self.assertIsNone(result)
+        self.assertTrue(os.path.exists(scope[STREAMED_UPLOAD].path))
+        await keys.complete(key, token, {"job_id": "first"})
+
+        # replay is answered from the reservation, its file is not streamed
+        with patch("app.uploads.StreamingUploadApp.receive_upload") as mock_receive_upload:
+            scope = await self.stream_scope(body, headers=headers, idempotency=keys)
+        self.assertEqual(mock_receive_upload.call_count, 0)
+        self.assertEqual(scope[IDEMPOTENCY_RESERVATION], (None, {"job_id": "first"}))
+        self.assertIsNone(scope[STREAMED_UPLOAD])